@@ -0,0 +1,183 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Cancellation release-latency benchmark.
+
+Starts streaming tasks through the A2A request handler and ADKAgentExecutor,
+with a local model that streams slowly and a tool that never finishes on its
+own. Half the tasks are cancelled while the model is streaming, half while
+the tool is running. The run fails unless every task ends canceled, its
+stream closes and the executor forgets it; then the time from tasks/cancel
+to the model stream or tool being released is reported.
+
+    uv run python -m benchmarks.cancellation --tasks 200
+"""
+
+import asyncio
+import statistics
+import time
+from collections.abc import AsyncGenerator
+
+import click
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import (
+    AgentCapabilities,
+    AgentCard,
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    Task,
+    TaskIdParams,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from google.adk import Runner
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from server.agents._adk_agent_executor import ADKAgentExecutor
+
+# Seconds the model or the tool would keep running if never cancelled
+HANG_SECONDS = 3600
+
+# perf_counter() at which each task's model stream or tool let go, by message text
+_released: dict[str, float] = {}
+
+
+class _SlowModel(BaseLlm):
+    """Streams a few tokens, then either calls brew or keeps streaming."""
+
+    model: str = "slow-model"
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse]:
+        parts = llm_request.contents[-1].parts or []
+        prompt = (parts[0].text or "") if parts else ""
+        yield LlmResponse(content=types.ModelContent("Brewing..."), partial=True)
+        if prompt.startswith("tool"):
+            yield LlmResponse(
+                content=types.ModelContent(
+                    [types.Part.from_function_call(name="brew", args={"order": prompt})]
+                )
+            )
+            return
+        try:
+            await asyncio.sleep(HANG_SECONDS)
+        finally:
+            _released.setdefault(prompt, time.perf_counter())
+
+
+async def brew(order: str) -> dict:
+    """Brews an order (never finishes on its own)."""
+    try:
+        await asyncio.sleep(HANG_SECONDS)
+    finally:
+        _released.setdefault(order, time.perf_counter())
+    return {"status": "brewed"}
+
+
+def _make_handler() -> tuple[DefaultRequestHandler, ADKAgentExecutor]:
+    agent = LlmAgent(name="barista", model=_SlowModel(), tools=[brew])
+    runner = Runner(
+        app_name="cancellation",
+        agent=agent,
+        session_service=InMemorySessionService(),
+    )
+    card = AgentCard(
+        name="barista",
+        description="Cancellation benchmark agent",
+        url="http://localhost/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(streaming=True),
+        default_input_modes=["text"],
+        default_output_modes=["text"],
+        skills=[],
+    )
+    executor = ADKAgentExecutor(runner=runner, card=card, fast_path="off")
+    return DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore()), executor
+
+
+async def _run_and_cancel(handler: DefaultRequestHandler, text: str) -> tuple[float, TaskState]:
+    """Starts one streaming task, cancels it mid-flight and returns the release latency."""
+    message = Message(
+        role=Role.user, parts=[Part(root=TextPart(text=text))], message_id=text
+    )
+    stream = handler.on_message_send_stream(MessageSendParams(message=message))
+    first = await anext(stream)
+    # A Task or, for a task the handler already created, a status update
+    if isinstance(first, Task):
+        task_id = first.id
+    elif isinstance(first, TaskStatusUpdateEvent):
+        task_id = first.task_id
+    else:
+        raise SystemExit(f"❌ {text}: stream started with {type(first).__name__}")
+    last_state = None
+
+    async def consume():
+        nonlocal last_state
+        async for event in stream:
+            status = getattr(event, "status", None)
+            if status is not None:
+                last_state = status.state
+
+    consumer = asyncio.create_task(consume())
+    # Let the run reach the model stream or the tool
+    await asyncio.sleep(0.2)
+    started = time.perf_counter()
+    task = await handler.on_cancel_task(TaskIdParams(id=task_id))
+    assert task is not None, "tasks/cancel returned no task"
+    await asyncio.wait_for(consumer, timeout=5)
+    if last_state != TaskState.canceled or text not in _released:
+        raise SystemExit(f"❌ {text}: stream ended in {last_state}, released: {text in _released}")
+    return _released[text] - started, task.status.state
+
+
+async def _benchmark(tasks: int) -> None:
+    handler, executor = _make_handler()
+    texts = [f"{'tool' if i % 2 else 'stream'}-{i}" for i in range(tasks)]
+    results = await asyncio.gather(*(_run_and_cancel(handler, text) for text in texts))
+
+    if any(state != TaskState.canceled for _, state in results):
+        raise SystemExit("❌ tasks/cancel did not return a canceled task")
+    if executor._running_sessions:
+        raise SystemExit("❌ executor still tracks cancelled runs")
+    print(f"✅ {tasks} tasks canceled, streams closed, nothing left running")
+
+    for label in ("stream", "tool"):
+        latencies = sorted(
+            latency * 1e3
+            for text, (latency, _) in zip(texts, results)
+            if text.startswith(label)
+        )
+        print(
+            f"{label:>6}: release p50 {statistics.median(latencies):6.2f} ms, "
+            f"max {latencies[-1]:6.2f} ms"
+        )
+
+
+@click.command()
+@click.option("--tasks", default=200, help="Number of concurrent tasks to cancel")
+def main(tasks: int):
+    """Report how quickly cancelled tasks release their model stream and tools."""
+    asyncio.run(_benchmark(tasks))
+
+
+if __name__ == "__main__":
+    main()
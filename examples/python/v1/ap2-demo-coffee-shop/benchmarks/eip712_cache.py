@@ -0,0 +1,115 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark for the precompiled EIP-712 cache.
+
+Signs the same stream of TransferWithAuthorization payloads with
+encode_typed_data and with the cached encoder, checks that every signature
+is byte-identical, and reports the per-signature time of each.
+
+    uv run python -m benchmarks.eip712_cache --count 2000
+"""
+
+import os
+import time
+
+import click
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+
+from common.typed_data import encode_typed_data_cached
+
+USDC_BASE_SEPOLIA = "0x036CbD53842c5426634e7929541eC2318f3dCF7e"
+
+
+def make_transfer_payload(account_address: str, value: int) -> dict:
+    """Builds an EIP-3009 TransferWithAuthorization payload like the client agent."""
+    return {
+        "types": {
+            "EIP712Domain": [
+                {"name": "name", "type": "string"},
+                {"name": "version", "type": "string"},
+                {"name": "chainId", "type": "uint256"},
+                {"name": "verifyingContract", "type": "address"},
+            ],
+            "TransferWithAuthorization": [
+                {"name": "from", "type": "address"},
+                {"name": "to", "type": "address"},
+                {"name": "value", "type": "uint256"},
+                {"name": "validAfter", "type": "uint256"},
+                {"name": "validBefore", "type": "uint256"},
+                {"name": "nonce", "type": "bytes32"},
+            ],
+        },
+        "domain": {
+            "name": "USDC",
+            "version": "2",
+            "chainId": 84532,
+            "verifyingContract": USDC_BASE_SEPOLIA,
+        },
+        "primaryType": "TransferWithAuthorization",
+        "message": {
+            "from": account_address,
+            "to": "0x000000000000000000000000000000000000dEaD",
+            "value": value,
+            "validAfter": 0,
+            "validBefore": 2**32,
+            "nonce": "0x" + os.urandom(32).hex(),
+        },
+    }
+
+
+def _time_per_item(func, payloads) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        func(payload)
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+
+@click.command()
+@click.option("--count", default=2000, help="Number of payloads to sign")
+def main(count: int):
+    """Compare encode_typed_data with the cached encoder."""
+    account = Account.create()
+    payloads = [make_transfer_payload(account.address, 45_000 + i) for i in range(count)]
+
+    def baseline(p):
+        return encode_typed_data(full_message=p)
+
+    expected = [account.sign_message(baseline(p)).signature for p in payloads]
+    actual = [account.sign_message(encode_typed_data_cached(p)).signature for p in payloads]
+    if expected != actual:
+        raise SystemExit("❌ Cached encoder produced different signatures!")
+
+    encode_before = _time_per_item(baseline, payloads)
+    encode_after = _time_per_item(encode_typed_data_cached, payloads)
+    sign_before = _time_per_item(lambda p: account.sign_message(baseline(p)), payloads)
+    sign_after = _time_per_item(
+        lambda p: account.sign_message(encode_typed_data_cached(p)), payloads
+    )
+
+    print(f"{count} TransferWithAuthorization payloads, signatures byte-identical")
+    print(f"{'':20}{'encode_typed_data':>20}{'cached':>12}{'speedup':>10}")
+    print(
+        f"{'encode (µs)':20}{encode_before:20.1f}{encode_after:12.1f}"
+        f"{encode_before / encode_after:9.2f}x"
+    )
+    print(
+        f"{'encode+sign (µs)':20}{sign_before:20.1f}{sign_after:12.1f}"
+        f"{sign_before / sign_after:9.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
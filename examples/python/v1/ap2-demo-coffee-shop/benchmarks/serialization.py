@@ -0,0 +1,169 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Per-order JSON serialization benchmark.
+
+Replays the JSON work one order causes (wallet request and response bodies
+for the intent, cart, transfer and payment signatures, the wallet's request
+logs and signature cache keys, the cart artifact parsed by the client, the
+forwarded payment mandate and the executor's log blocks), once with the
+standard library calls the code used before common.codec and once through
+common.codec, and reports the time per order of each.
+
+    uv run --extra fast python -m benchmarks.serialization --orders 2000
+"""
+
+import json
+import time
+import uuid
+from typing import Any
+
+import click
+
+from benchmarks.eip712_cache import make_transfer_payload
+from common import codec
+
+
+def make_order_documents(index: int) -> dict[str, Any]:
+    """Builds the documents one order serializes, shaped like the real ones."""
+    amount = {"currency": "USD", "value": 0.058}
+    cart_contents: dict[str, Any] = {
+        "id": f"cart_{uuid.uuid4()}",
+        "user_cart_confirmation_required": True,
+        "payment_request": {
+            "method_data": [
+                {
+                    "supported_methods": "https://www.x402.org/",
+                    "data": {
+                        "x402.payment.required": {
+                            "x402Version": 1,
+                            "accepts": [
+                                {
+                                    "scheme": "exact",
+                                    "network": "base-sepolia",
+                                    "asset": "0x036CbD53842c5426634e7929541eC2318f3dCF7e",
+                                    "payTo": "0x" + "ab" * 20,
+                                    "maxAmountRequired": "58000",
+                                }
+                            ],
+                        }
+                    },
+                }
+            ],
+            "details": {
+                "id": f"order_{index}_{uuid.uuid4()}",
+                "display_items": [
+                    {"label": "Tall 아메리카노 x8", "amount": amount, "refund_period": 30},
+                    {"label": "Grande 카페라떼 x4", "amount": amount, "refund_period": 30},
+                ],
+                "total": {"label": "Total", "amount": amount, "refund_period": 30},
+            },
+        },
+        "cart_expiry": "2025-01-01T00:15:00+00:00",
+        "merchant_name": "☕ AI Coffee Shop",
+    }
+    intent = {
+        "natural_language_description": "아메리카노 8잔이랑 그란데 라떼 4잔",
+        "intent_expiry": "2025-01-01T01:00:00+00:00",
+        "requires_refundability": False,
+    }
+    payment_mandate = {
+        "payment_mandate_contents": {
+            "payment_mandate_id": str(uuid.uuid4()),
+            "payment_details_id": cart_contents["payment_request"]["details"]["id"],
+            "payment_details_total": cart_contents["payment_request"]["details"]["total"],
+            "merchant_agent": "☕ AI Coffee Shop",
+        }
+    }
+    return {
+        "intent": intent,
+        "cart_contents": cart_contents,
+        "transfer": make_transfer_payload("0x" + "cd" * 20, 58000 + index),
+        "payment_mandate": payment_mandate,
+    }
+
+
+def _stdlib_order(docs: dict[str, Any]) -> None:
+    """The JSON calls of one order as written before common.codec."""
+    signature = {"signature": "0x" + "11" * 65, "address": "0x" + "cd" * 20}
+    sign_requests = [
+        {"payload": json.dumps(docs["intent"])},
+        {"payload": json.dumps(docs["cart_contents"])},
+        docs["transfer"],
+        {"payload": json.dumps(docs["payment_mandate"])},
+    ]
+    for request in sign_requests:
+        body = json.dumps(request).encode()  # httpx json=
+        payload = json.loads(body)  # wallet request.get_json()
+        json.dumps(payload, indent=2)  # wallet request log
+        json.dumps(payload, sort_keys=True, separators=(",", ":"), default=repr)  # cache key
+        json.loads(json.dumps(signature).encode())  # jsonify and response.json()
+    artifact = {"contents": docs["cart_contents"], "merchant_authorization": "0x" + "22" * 65}
+    json.loads(json.dumps(artifact))  # client parses the cart artifact
+    json.dumps(artifact, ensure_ascii=False, indent=2)  # executor log block
+    json.dumps(docs["payment_mandate"])  # forward_signed_payment_mandate
+
+
+def _codec_order(docs: dict[str, Any]) -> None:
+    """The same calls through common.codec."""
+    signature = {"signature": "0x" + "11" * 65, "address": "0x" + "cd" * 20}
+    sign_requests = [
+        {"payload": codec.dumps_str(docs["intent"])},
+        {"payload": codec.dumps_str(docs["cart_contents"])},
+        docs["transfer"],
+        {"payload": codec.dumps_str(docs["payment_mandate"])},
+    ]
+    for request in sign_requests:
+        body = codec.dumps(request)
+        payload = codec.loads(body)
+        codec.dumps_str(payload, indent=True)
+        codec.dumps(payload, sort_keys=True, default=repr)
+        codec.loads(codec.dumps(signature))
+    artifact = {"contents": docs["cart_contents"], "merchant_authorization": "0x" + "22" * 65}
+    codec.loads(codec.dumps(artifact))
+    codec.dumps_str(artifact, indent=True)
+    codec.dumps_str(docs["payment_mandate"])
+
+
+def _per_order_us(run, orders: list[dict[str, Any]]) -> float:
+    start = time.perf_counter()
+    for docs in orders:
+        run(docs)
+    return (time.perf_counter() - start) / len(orders) * 1e6
+
+
+@click.command()
+@click.option("--orders", default=2000, help="Number of orders to replay")
+def main(orders: int):
+    """Report per-order serialization time with stdlib json and common.codec."""
+    documents = [make_order_documents(i) for i in range(orders)]
+
+    for docs in documents[:50]:
+        for doc in docs.values():
+            if codec.loads(codec.dumps(doc)) != json.loads(json.dumps(doc)):
+                raise SystemExit("❌ codec round trip differs from stdlib json")
+    print(f"✅ codec round trips match stdlib json (backend: {codec.BACKEND})")
+
+    # Warm up both paths before timing
+    _per_order_us(_stdlib_order, documents[:100])
+    _per_order_us(_codec_order, documents[:100])
+
+    before = _per_order_us(_stdlib_order, documents)
+    after = _per_order_us(_codec_order, documents)
+    print(f"stdlib json:  {before:8.1f} µs/order")
+    print(f"common.codec: {after:8.1f} µs/order ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
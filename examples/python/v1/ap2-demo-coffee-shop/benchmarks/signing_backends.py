@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Parity check and throughput benchmark for the wallet signing backends.
+
+Every available backend signs the same EIP-712 and personal-sign payloads;
+the run fails unless all signatures match eth_account's sign_message
+byte for byte. Then each backend's signatures per second are reported.
+
+    uv run --extra native python -m benchmarks.signing_backends --count 2000
+"""
+
+import json
+import time
+import uuid
+
+import click
+from eth_account import Account
+
+from benchmarks.eip712_cache import make_transfer_payload
+from common import signing
+from common.backends import (
+    EthAccountBackend,
+    NativeBackend,
+    SigningBackend,
+    coincurve,
+)
+
+
+def make_mandate_payload(index: int) -> dict:
+    """Builds a personal-sign payload shaped like a signed mandate."""
+    mandate = {
+        "payment_mandate_contents": {
+            "payment_mandate_id": str(uuid.uuid4()),
+            "payment_details_id": f"order_{index}",
+            "merchant_agent": "☕ AI Coffee Shop",
+        }
+    }
+    return {"payload": json.dumps(mandate)}
+
+
+def _throughput(backend, payloads) -> float:
+    start = time.perf_counter()
+    for payload in payloads:
+        signing.sign_payload(backend, payload)
+    return len(payloads) / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option("--count", default=2000, help="Number of payloads per kind")
+def main(count: int):
+    """Check backend parity and report signatures per second."""
+    account = Account.create()
+    payloads = {
+        "eip712": [make_transfer_payload(account.address, i) for i in range(count)],
+        "personal": [make_mandate_payload(i) for i in range(count)],
+    }
+
+    backends: list[SigningBackend] = [EthAccountBackend(account)]
+    if coincurve is not None:
+        backends.append(NativeBackend(account))
+    else:
+        print("coincurve not installed; only the eth_account backend is available.")
+
+    for kind, items in payloads.items():
+        expected = [
+            "0x" + account.sign_message(signing.encode_payload(p)).signature.hex()
+            for p in items
+        ]
+        for backend in backends:
+            actual = [signing.sign_payload(backend, p) for p in items]
+            if actual != expected:
+                raise SystemExit(f"❌ {backend.name} signatures differ for {kind} payloads")
+    print(f"✅ All backends match sign_message on {count} EIP-712 and personal payloads")
+
+    print(f"{'backend':14}{'eip712 sig/s':>16}{'personal sig/s':>18}")
+    for backend in backends:
+        print(
+            f"{backend.name:14}"
+            f"{_throughput(backend, payloads['eip712']):16.0f}"
+            f"{_throughput(backend, payloads['personal']):18.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,9 @@
 """Root agent configuration for the coffee shop client."""
 
 import httpx
+from a2a.client.client import ClientConfig
+from a2a.client.client_factory import ClientFactory
+from a2a.types import TransportProtocol
 from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
 
 from client_agent.coffee_client_agent import CoffeeClientAgent
@@ -29,6 +32,17 @@ def create_root_agent():
     # Create shared HTTP client
     async_client = httpx.AsyncClient(timeout=30)
 
+    # Stream task updates (message/stream over SSE) so model output and tool
+    # progress from the coffee shop arrive as they happen
+    a2a_client_factory = ClientFactory(
+        config=ClientConfig(
+            httpx_client=async_client,
+            streaming=True,
+            polling=False,
+            supported_transports=[TransportProtocol.jsonrpc],
+        )
+    )
+
     # Create RemoteA2aAgent instances for each remote agent
     remote_agents = []
     for address in REMOTE_AGENT_ADDRESSES:
@@ -38,7 +52,7 @@ def create_root_agent():
             RemoteA2aAgent(
                 name=agent_name,
                 agent_card=agent_card_url,
-                httpx_client=async_client,
+                a2a_client_factory=a2a_client_factory,
             )
         )
 
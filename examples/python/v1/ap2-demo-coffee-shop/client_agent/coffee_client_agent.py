@@ -35,6 +35,11 @@ from web3 import Web3
 from x402_a2a.core.utils import x402Utils
 from x402_a2a.core.wallet import get_transfer_with_auth_typed_data
 
+from common import codec
+from common.canonical import CanonicalPayload
+from common.merkle import CHAIN_IDS, cart_authorization_signer, is_merkle_authorization
+from common.signer import Signer, create_signer
+
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -83,9 +88,19 @@ class CoffeeClientAgent:
         self,
         remote_agents: list[BaseAgent],
         http_client: httpx.AsyncClient,
+        signer: Signer | None = None,
     ):
-        """Initialize the CoffeeClientAgent."""
+        """
+        Initialize the CoffeeClientAgent.
+
+        Args:
+            remote_agents: Merchant agents exposed as tools
+            http_client: Shared HTTP client
+            signer: Wallet signer. Defaults to the backend selected by
+                LOCAL_WALLET_URL (http:// wallet service or inproc://).
+        """
         self.httpx_client = http_client
+        self.signer = signer or create_signer(http_client=http_client)
         self.remote_agents = remote_agents
         agent_list = [
             {"name": agent.name, "description": agent.description}
@@ -125,10 +140,7 @@ class CoffeeClientAgent:
             return
 
         try:
-            wallet_url = os.getenv("LOCAL_WALLET_URL", "http://localhost:5001")
-            response = await self.httpx_client.get(f"{wallet_url}/address")
-            response.raise_for_status()
-            self._wallet_address = response.json().get("address")
+            self._wallet_address = await self.signer.get_address()
             logger.info(f"Connected to wallet: {self._wallet_address[:10]}...")
         except httpx.RequestError as e:
             logger.error(f"Could not connect to wallet: {e}")
@@ -140,14 +152,16 @@ class CoffeeClientAgent:
         Parses the cart mandate and informs the user about the order details.
         """
         try:
-            cart_mandate = json.loads(cart_mandate_str)
-        except json.JSONDecodeError:
+            cart_mandate = codec.loads(cart_mandate_str)
+        except codec.JSONDecodeError:
             logger.error(f"Failed to decode cart_mandate_str: {cart_mandate_str}")
             return "☕ 주문 정보를 이해하지 못했습니다. 다시 시도해주세요."
 
         # Unwrap the mandate data
         unwrapped_mandate = cart_mandate.get("data", cart_mandate)
         cart_data = unwrapped_mandate.get("ap2.mandates.CartMandate", unwrapped_mandate)
+        if not self._merchant_authorization_valid(cart_data):
+            return "⛔ 가맹점 서명을 확인할 수 없는 주문입니다. 다시 주문해주세요."
         tool_context.state["cart_mandate"] = cart_data
 
         # Extract order details
@@ -187,6 +201,49 @@ class CoffeeClientAgent:
 """
         return user_message
 
+    def _merchant_authorization_valid(self, cart_data: dict[str, Any]) -> bool:
+        """
+        Checks a Merkle-batched merchant_authorization: the cart's inclusion
+        proof, and a root signed for the cart's payee and chain. The root
+        signer must be MERCHANT_SIGNER_ADDRESS; without it Merkle-authorized
+        carts are rejected. Other authorizations are passed through unchanged.
+        """
+        authorization = cart_data.get("merchant_authorization")
+        if not is_merkle_authorization(authorization):
+            return True
+        expected_signer = os.getenv("MERCHANT_SIGNER_ADDRESS")
+        if not expected_signer:
+            logger.error(
+                "MERCHANT_SIGNER_ADDRESS is not set; cannot check who signed the cart root"
+            )
+            return False
+
+        contents = cart_data.get("contents", {})
+        method_data = contents.get("payment_request", {}).get("method_data", [])
+        requirement = None
+        for method in method_data:
+            if method.get("supported_methods") == "https://www.x402.org/":
+                accepts = method.get("data", {}).get("x402.payment.required", {}).get("accepts")
+                requirement = accepts[0] if accepts else None
+                break
+        if requirement is None or requirement.get("network") not in CHAIN_IDS:
+            logger.error("Cart has no x402 requirement to check its authorization against")
+            return False
+
+        signer = cart_authorization_signer(
+            contents,
+            authorization,
+            merchant_address=requirement["payTo"],
+            chain_id=CHAIN_IDS[requirement["network"]],
+        )
+        if signer is None:
+            logger.error("Cart's Merkle merchant authorization is invalid")
+            return False
+        if signer.lower() != expected_signer.lower():
+            logger.error("Cart root was signed by %s, not the merchant", signer)
+            return False
+        return True
+
     def pay_for_cart(self, tool_context: ToolContext) -> dict[str, str]:
         """Initiates payment for the cart."""
         logger.info("Initiating payment for cart...")
@@ -276,7 +333,7 @@ class CoffeeClientAgent:
             amount_usd = value / 1_000_000
 
             return {
-                "user_message": f"💳 ${amount_usd:.2f} USDC 결제를 준비했습니다.\n\n"
+                "user_message": f"💳 ${amount_usd:.6f} USDC 결제를 준비했습니다.\n\n"
                                f"결제를 승인하려면 'sign payment request' 또는 '결제 승인'이라고 말씀해주세요."
             }
 
@@ -293,13 +350,7 @@ class CoffeeClientAgent:
             return {"user_message": "서명할 결제 요청이 없습니다."}
 
         try:
-            wallet_url = os.getenv("LOCAL_WALLET_URL", "http://localhost:5001")
-            response = await self.httpx_client.post(
-                f"{wallet_url}/sign",
-                json=request_to_sign,
-            )
-            response.raise_for_status()
-            signature_data = response.json()
+            signature_data = await self.signer.sign(request_to_sign)
 
             purchase_details = tool_context.state.get("purchase_details")
             if not purchase_details:
@@ -355,7 +406,7 @@ class CoffeeClientAgent:
             payment_mandate_contents=payment_mandate_contents
         )
 
-        tool_context.state["payment_mandate_to_sign"] = payment_mandate.model_dump(by_alias=True)
+        tool_context.state["payment_mandate_to_sign"] = payment_mandate.model_dump(mode="json", by_alias=True)
         tool_context.state["purchase_details"] = None
 
         return {
@@ -372,15 +423,8 @@ class CoffeeClientAgent:
             return {"user_message": "서명할 결제 승인서가 없습니다."}
 
         try:
-            wallet_url = os.getenv("LOCAL_WALLET_URL", "http://localhost:5001")
-            payload_to_sign = json.dumps(mandate_to_sign)
-
-            response = await self.httpx_client.post(
-                f"{wallet_url}/sign",
-                json={"payload": payload_to_sign},
-            )
-            response.raise_for_status()
-            signature_data = response.json()
+            payload_to_sign = CanonicalPayload.from_data(mandate_to_sign)
+            signature_data = await self.signer.sign(payload_to_sign.sign_request())
 
             # AP2 표준: payment_mandate_contents 루트 래핑 + user_authorization
             mandate_contents = mandate_to_sign.get(
@@ -423,7 +467,7 @@ class CoffeeClientAgent:
             }
 
         try:
-            message = json.dumps(signed_mandate)
+            message = codec.dumps_str(signed_mandate)
         except Exception as e:
             logger.error(f"Failed to serialize signed_payment_mandate: {e}")
             return {"user_message": "승인서 직렬화에 실패했습니다."}
@@ -452,7 +496,7 @@ class CoffeeClientAgent:
                 datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
             ).isoformat(),
         )
-        tool_context.state["intent_mandate_to_sign"] = mandate.model_dump(by_alias=True)
+        tool_context.state["intent_mandate_to_sign"] = mandate.model_dump(mode="json", by_alias=True)
 
         return {
             "user_message": f"☕ 주문 의향서를 생성했습니다:\n\n"
@@ -469,15 +513,8 @@ class CoffeeClientAgent:
             return {"user_message": "서명할 주문 의향서가 없습니다. 먼저 주문 내용을 알려주세요."}
 
         try:
-            wallet_url = os.getenv("LOCAL_WALLET_URL", "http://localhost:5001")
-            payload_to_sign = json.dumps(mandate_to_sign)
-
-            response = await self.httpx_client.post(
-                f"{wallet_url}/sign",
-                json={"payload": payload_to_sign},
-            )
-            response.raise_for_status()
-            signature_data = response.json()
+            payload_to_sign = CanonicalPayload.from_data(mandate_to_sign)
+            signature_data = await self.signer.sign(payload_to_sign.sign_request())
 
             signed_mandate = mandate_to_sign.copy()
             signed_mandate["signature"] = {
@@ -535,6 +572,8 @@ class CoffeeClientAgent:
 사용자가 주문을 확정하면:
 1. `create_intent_mandate` 도구를 사용하여 상세한 주문 설명을 포함한 의향서를 생성합니다.
    - natural_language_description에는 "Grande 아메리카노 1잔 (일반 원두)" 형식으로 작성합니다.
+   - skus에는 잔마다 "음료/사이즈/원두" 하나씩 넣습니다. 예: Grande 아메리카노 2잔 → ["아메리카노/Grande/일반", "아메리카노/Grande/일반"]
+     (skus가 있으면 커피숍이 LLM 없이 바로 장바구니를 만듭니다.)
 2. 사용자에게 서명 요청을 안내합니다.
 
 ### 3단계: 의향서 서명 및 전달
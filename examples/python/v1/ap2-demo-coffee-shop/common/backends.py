@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""secp256k1 signing backends for the wallet."""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from types import ModuleType
+
+from eth_account.signers.local import LocalAccount
+from eth_typing import Hash32
+
+coincurve: ModuleType | None
+try:
+    import coincurve
+except ImportError:  # Optional: install with the "native" extra
+    coincurve = None
+
+logger = logging.getLogger(__name__)
+
+# auto: native when coincurve is installed, otherwise eth_account
+DEFAULT_BACKEND = os.environ.get("WALLET_SIGNING_BACKEND", "auto")
+
+
+class SigningBackend(ABC):
+    """Signs 32-byte message hashes with a single account's key."""
+
+    name: str
+
+    def __init__(self, account: LocalAccount):
+        self.account = account
+
+    @property
+    def address(self) -> str:
+        return self.account.address
+
+    @abstractmethod
+    def sign_hash(self, message_hash: bytes) -> bytes:
+        """Returns the 65-byte r || s || v signature (v in {27, 28})."""
+
+
+class EthAccountBackend(SigningBackend):
+    """eth_account's default signing path."""
+
+    name = "eth_account"
+
+    def sign_hash(self, message_hash: bytes) -> bytes:
+        return bytes(self.account.unsafe_sign_hash(Hash32(message_hash)).signature)
+
+
+class NativeBackend(SigningBackend):
+    """
+    Signs with libsecp256k1 through coincurve, keeping the parsed key so no
+    per-signature key setup is needed.
+    """
+
+    name = "native"
+
+    def __init__(self, account: LocalAccount):
+        if coincurve is None:
+            raise RuntimeError("coincurve is not installed.")
+        super().__init__(account)
+        self._private_key = coincurve.PrivateKey(bytes(account.key))
+
+    def sign_hash(self, message_hash: bytes) -> bytes:
+        # coincurve returns r || s || recovery_id with a low-s, RFC 6979 nonce,
+        # matching eth_keys; Ethereum expects v = recovery_id + 27.
+        signature = self._private_key.sign_recoverable(message_hash, hasher=None)
+        return signature[:64] + bytes([signature[64] + 27])
+
+
+def create_backend(account: LocalAccount, name: str = DEFAULT_BACKEND) -> SigningBackend:
+    """
+    Creates a signing backend for the account.
+
+    Args:
+        account: The account whose key signs
+        name: "auto", "native" or "eth_account"
+    """
+    if name == "auto":
+        name = "native" if coincurve is not None else "eth_account"
+    if name == "native":
+        return NativeBackend(account)
+    if name == "eth_account":
+        return EthAccountBackend(account)
+    raise ValueError(f"Unknown signing backend: {name}")
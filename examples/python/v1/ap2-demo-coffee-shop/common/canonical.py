@@ -0,0 +1,62 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Canonical bytes for signed mandates.
+
+A mandate is serialized once into its canonical form: JSON with sorted keys,
+no insignificant whitespace and UTF-8 text. Those exact bytes are signed and
+travel with the object, and a verifier holding only the object derives the
+same bytes again, so signatures never break on key order or spacing.
+"""
+
+import functools
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+
+
+def canonical_json(obj: Any) -> bytes:
+    """Returns the canonical JSON bytes of a JSON-compatible object."""
+    return json.dumps(
+        obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class CanonicalPayload:
+    """A JSON-compatible object together with its exact signed bytes."""
+
+    data: Any
+    body: bytes
+
+    @classmethod
+    def from_data(cls, data: Any) -> "CanonicalPayload":
+        """Serializes a JSON-compatible object once."""
+        return cls(data=data, body=canonical_json(data))
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> "CanonicalPayload":
+        """Serializes a pydantic model once, using its wire (alias) names."""
+        return cls.from_data(model.model_dump(mode="json", by_alias=True))
+
+    @functools.cached_property
+    def text(self) -> str:
+        """The signed bytes as text, the form the wallet signs."""
+        return self.body.decode("utf-8")
+
+    def sign_request(self) -> dict[str, str]:
+        """Returns the wallet /sign payload for these bytes."""
+        return {"payload": self.text}
@@ -0,0 +1,132 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Coalesces concurrent signing requests into batched signer calls."""
+
+import asyncio
+import contextvars
+import logging
+from typing import Any
+
+from common.signer import Signer, WalletSigningError
+
+logger = logging.getLogger(__name__)
+
+
+class SignatureCoalescer(Signer):
+    """
+    Gathers signing requests issued within a short window and signs them
+    with a single sign_many call on the wrapped signer (one /sign/batch
+    round trip for the HTTP backend).
+
+    Each caller awaits its own result; signatures are fanned back out to the
+    waiting coroutines in request order.
+    """
+
+    def __init__(
+        self,
+        signer: Signer,
+        window_seconds: float = 0.005,
+        max_batch_size: int = 64,
+    ):
+        """
+        Initialize the coalescer.
+
+        Args:
+            signer: The signer that performs the batched calls
+            window_seconds: How long to wait for more requests before flushing
+            max_batch_size: Flush immediately once this many requests are queued
+        """
+        self._signer = signer
+        self._window_seconds = window_seconds
+        self._max_batch_size = max_batch_size
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def get_address(self) -> str:
+        return await self._signer.get_address()
+
+    async def sign(self, payload: Any) -> dict[str, Any]:
+        """
+        Queues a payload for signing and waits for its result.
+
+        Returns:
+            Dictionary with "signature" and "address" keys, matching /sign
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window_seconds, self._flush)
+
+        return await future
+
+    async def sign_many(self, payloads: list[Any]) -> list[dict[str, Any]]:
+        return await self._signer.sign_many(payloads)
+
+    def _flush(self) -> None:
+        """Hands the queued requests to a background batch call."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        # Callers cancelled while queued (e.g. a cancelled task) are not signed
+        batch = [entry for entry in self._pending if not entry[1].cancelled()]
+        self._pending = []
+        if not batch:
+            return
+
+        # The batch serves several callers, so it runs outside any one
+        # caller's context (and deadline); each caller's wait stays bounded
+        task = asyncio.get_running_loop().create_task(
+            self._send_batch(batch), context=contextvars.Context()
+        )
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send_batch(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        """Signs a batch and resolves each caller's future."""
+        try:
+            results = await self._signer.sign_many([payload for payload, _ in batch])
+            if len(results) != len(batch):
+                raise WalletSigningError(
+                    f"Wallet returned {len(results)} results for {len(batch)} payloads"
+                )
+        except Exception as e:
+            logger.exception(f"Batch signing of {len(batch)} payloads failed")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.info(f"Signed batch of {len(batch)} payloads.")
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if "signature" in result:
+                future.set_result(result)
+            else:
+                future.set_exception(
+                    WalletSigningError(result.get("error", "Unknown signing error"))
+                )
+
+    async def aclose(self) -> None:
+        """Flushes outstanding requests and closes the wrapped signer."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self._signer.aclose()
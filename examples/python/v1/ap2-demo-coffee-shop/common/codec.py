@@ -0,0 +1,129 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+JSON codec shared by the agents and the wallet.
+
+Uses orjson when it is installed (the "fast" extra) and the standard library
+otherwise. Both produce compact UTF-8 JSON without ASCII escaping, so the
+output only differs in float formatting edge cases. Values orjson cannot
+encode (integers beyond 64 bits, non-string keys) fall back to the standard
+library.
+
+Signed bytes do not go through this module; see common.canonical, which must
+produce the same bytes whichever libraries the signer and verifier have.
+"""
+
+import functools
+import json
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any
+
+orjson: ModuleType | None
+try:
+    import orjson
+except ImportError:  # Optional: install with the "fast" extra
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Raised by loads for malformed input (orjson's error subclasses it)
+JSONDecodeError = json.JSONDecodeError
+
+
+@functools.lru_cache(maxsize=32)
+def _encoder(
+    sort_keys: bool, indent: bool, default: Callable[[Any], Any] | None
+) -> json.JSONEncoder:
+    # json.dumps builds a new encoder for any non-default argument; reuse them
+    return json.JSONEncoder(
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        default=default,
+    )
+
+
+def _dumps_stdlib(
+    obj: Any, sort_keys: bool, indent: bool, default: Callable[[Any], Any] | None
+) -> str:
+    return _encoder(sort_keys, indent, default).encode(obj)
+
+
+def _dumps_orjson(
+    obj: Any, sort_keys: bool, indent: bool, default: Callable[[Any], Any] | None
+) -> bytes | None:
+    if orjson is None:
+        return None
+    option = 0
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(obj, default=default, option=option)
+    except TypeError:
+        # orjson.JSONEncodeError; the caller retries with the standard library
+        return None
+
+
+def dumps(
+    obj: Any,
+    *,
+    sort_keys: bool = False,
+    indent: bool = False,
+    default: Callable[[Any], Any] | None = None,
+) -> bytes:
+    """
+    Serializes obj to UTF-8 JSON bytes.
+
+    Args:
+        obj: The object to serialize
+        sort_keys: Sort object keys
+        indent: Pretty-print with two-space indentation (for logs)
+        default: Called for objects that are not JSON-serializable
+    """
+    if orjson is not None:
+        data = _dumps_orjson(obj, sort_keys, indent, default)
+        if data is not None:
+            return data
+    return _dumps_stdlib(obj, sort_keys, indent, default).encode("utf-8")
+
+
+def dumps_str(
+    obj: Any,
+    *,
+    sort_keys: bool = False,
+    indent: bool = False,
+    default: Callable[[Any], Any] | None = None,
+) -> str:
+    """Serializes obj to a JSON string. See dumps."""
+    if orjson is not None:
+        data = _dumps_orjson(obj, sort_keys, indent, default)
+        if data is not None:
+            return data.decode("utf-8")
+    return _dumps_stdlib(obj, sort_keys, indent, default)
+
+
+def loads(data: bytes | bytearray | str) -> Any:
+    """
+    Parses JSON from bytes or text.
+
+    Raises:
+        JSONDecodeError: If the input is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+End-to-end deadlines for agent tasks.
+
+A task's deadline is set once, where the request comes in, and carried in a
+context variable. Everything the task awaits (model turns, tool calls and
+the tasks they spawn, wallet and facilitator requests) reads it from there,
+so no call outlives the task that made it. Nested scopes can only tighten
+the deadline.
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextvars import ContextVar
+from typing import Any
+
+# Request metadata key a client can use to ask for a shorter task timeout
+TIMEOUT_METADATA_KEY = "timeout_seconds"
+
+# Server-side task timeout when AGENT_TASK_TIMEOUT_SECONDS is not set
+DEFAULT_TASK_TIMEOUT_SECONDS = 120.0
+
+# Absolute time.monotonic() deadline of the current task, if any
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+def default_task_timeout() -> float:
+    """The server's task timeout (and the most a request may ask for)."""
+    return float(os.getenv("AGENT_TASK_TIMEOUT_SECONDS", DEFAULT_TASK_TIMEOUT_SECONDS))
+
+
+def request_timeout(*metadata: dict[str, Any] | None, default: float) -> float:
+    """
+    Returns the timeout requested in A2A metadata (the first of the given
+    dicts that has one), capped at the server's default. Missing or invalid
+    values use the default.
+    """
+    value = next(
+        (m[TIMEOUT_METADATA_KEY] for m in metadata if m and TIMEOUT_METADATA_KEY in m),
+        None,
+    )
+    if value is None:
+        return default
+    try:
+        requested = float(value)
+    except (TypeError, ValueError):
+        return default
+    if requested <= 0:
+        return default
+    return min(requested, default)
+
+
+@contextlib.contextmanager
+def scope(seconds: float | None) -> Iterator[None]:
+    """Sets the deadline seconds from now for the enclosed code, unless one is sooner."""
+    current = _deadline.get()
+    if seconds is not None:
+        candidate = time.monotonic() + seconds
+        if current is None or candidate < current:
+            current = candidate
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def timeout(default: float) -> float:
+    """A call's own timeout, shortened to the time left before the deadline."""
+    left = remaining()
+    return default if left is None else min(default, left)
+
+
+@contextlib.asynccontextmanager
+async def bounded(default: float) -> AsyncIterator[None]:
+    """
+    Bounds a call that takes no timeout argument by its own default and
+    the deadline.
+
+    Raises:
+        TimeoutError: If the call does not finish in time
+    """
+    async with asyncio.timeout(timeout(default)):
+        yield
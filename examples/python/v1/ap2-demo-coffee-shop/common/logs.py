@@ -0,0 +1,156 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Logging for the request hot path.
+
+- Lazy arguments: pass lazy(func, ...) as a %-style argument and func runs
+  only when a record is actually emitted, not when it is dropped by level
+  or sampling.
+- Per-category sampling: a category is a logger name (and its children);
+  LOG_SAMPLE_RATES="executor.messages=0.1,wallet.requests=0" keeps 10% of
+  the executor's message blocks and none of the wallet's request dumps.
+  Warnings and errors are always kept.
+- Non-blocking output: records go onto a queue, and a background thread
+  formats and writes them, so neither formatting nor log I/O stalls the
+  event loop. Pool worker processes, which run no event loop, write
+  directly instead.
+"""
+
+import atexit
+import copy
+import logging
+import os
+import queue
+import random
+from collections.abc import Callable
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from common import codec
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class Lazy:
+    """A log argument computed when the record is formatted."""
+
+    __slots__ = ("_args", "_func", "_kwargs")
+
+    def __init__(self, func: Callable[..., Any], *args: Any, **kwargs: Any):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self._func(*self._args, **self._kwargs))
+
+
+def lazy(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Lazy:
+    """Defers func(*args, **kwargs) until the log record is emitted."""
+    return Lazy(func, *args, **kwargs)
+
+
+def pretty_json(obj: Any) -> Lazy:
+    """Indented JSON of obj, serialized only if the record is emitted."""
+    return Lazy(codec.dumps_str, obj, indent=True, default=str)
+
+
+def parse_sample_rates(spec: str | None) -> dict[str, float]:
+    """Parses "category=rate,..." (rates between 0 and 1)."""
+    rates = {}
+    for item in (spec or "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a configured fraction of each category's records below WARNING."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self._rates = rates
+        # Resolved rate per logger name
+        self._by_logger: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._by_logger.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self._rates:
+                    rate = self._rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._by_logger[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queues records unformatted. The stock QueueHandler.prepare() merges the
+    message and its arguments on the emitting thread; here the writer thread
+    does that, so Lazy arguments and pretty_json run off the event loop.
+    Arguments are read when the record is written, not when it is logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+def _install(handler: logging.Handler) -> None:
+    """Makes handler, with sampling, the root logger's only handler."""
+    handler.addFilter(SamplingFilter(parse_sample_rates(os.getenv("LOG_SAMPLE_RATES"))))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+
+def configure(fmt: str = DEFAULT_FORMAT) -> QueueListener:
+    """
+    Routes the root logger through a sampling queue handler to a stderr
+    writer thread. The level comes from LOG_LEVEL (default INFO) and sample
+    rates from LOG_SAMPLE_RATES.
+    """
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    writer = logging.StreamHandler()
+    writer.setFormatter(logging.Formatter(fmt))
+
+    handler = DeferredQueueHandler(records)
+    _install(handler)
+
+    listener = QueueListener(records, writer, respect_handler_level=True)
+    listener.start()
+    # Drain what is queued before the process exits
+    atexit.register(listener.stop)
+    return listener
+
+
+def configure_worker(fmt: str = DEFAULT_FORMAT) -> None:
+    """
+    Routes the root logger of a pool worker process straight to stderr. A
+    forked worker inherits the parent's queue handler but not its writer
+    thread, so its records would otherwise never be written.
+    """
+    writer = logging.StreamHandler()
+    writer.setFormatter(logging.Formatter(fmt))
+    _install(writer)
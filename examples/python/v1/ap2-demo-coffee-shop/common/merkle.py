@@ -0,0 +1,311 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Merkle-batched merchant authorization for CartMandates.
+
+Instead of one signature per cart, the merchant signs the Merkle root of all
+carts created within a short window. Each CartMandate's merchant_authorization
+then carries the root, the root signature and the cart's inclusion proof:
+
+    {"alg": "merkle-keccak256", "root": "0x..", "proof": ["0x..", ...],
+     "merchant": "0x..", "chain_id": 84532, "signature": "0x.."}
+
+Leaves are keccak256(0x00 || cart bytes) and inner nodes keccak256(0x01 ||
+children), so an inner node can never pass as a cart. Children are hashed
+in sorted order, so proofs need no left/right flags; a node without a
+sibling is paired with itself.
+
+The root is signed as EIP-712 typed data (CART_BATCH_TYPES) that binds it
+to the merchant's payee address and chain id, so the signature is not a
+valid personal message or an authorization for another merchant or chain.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+from typing import Any, TypeGuard
+
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_utils import keccak
+
+from common import codec
+from common.canonical import canonical_json
+from common.signer import Signer, WalletSigningError
+
+logger = logging.getLogger(__name__)
+
+MERKLE_AUTHORIZATION_ALG = "merkle-keccak256"
+
+# Hash prefixes separating leaves from inner nodes
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# Chain ids of the x402 networks carts can be paid on
+CHAIN_IDS = {"base": 8453, "base-sepolia": 84532}
+
+CART_BATCH_DOMAIN_NAME = "AP2 Merchant Cart Authorization"
+CART_BATCH_TYPES = {
+    "EIP712Domain": [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+    ],
+    "CartBatch": [
+        {"name": "root", "type": "bytes32"},
+        {"name": "merchant", "type": "address"},
+    ],
+}
+
+
+def cart_leaf(payload: str | bytes | dict) -> bytes:
+    """
+    Hashes the signed cart payload into a Merkle leaf. Cart contents given
+    as an object are hashed as their canonical bytes.
+    """
+    if isinstance(payload, dict):
+        data = canonical_json(payload)
+    elif isinstance(payload, bytes):
+        data = payload
+    else:
+        data = payload.encode("utf-8")
+    return keccak(LEAF_PREFIX + data)
+
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    return keccak(NODE_PREFIX + a + b) if a <= b else keccak(NODE_PREFIX + b + a)
+
+
+def build_levels(leaves: list[bytes]) -> list[list[bytes]]:
+    """Builds the tree bottom-up; the last level holds the root."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [
+            _hash_pair(level[i], level[min(i + 1, len(level) - 1)])
+            for i in range(0, len(level), 2)
+        ]
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels: list[list[bytes]], index: int) -> list[bytes]:
+    """Returns the sibling hashes proving the leaf at `index`."""
+    proof = []
+    for level in levels[:-1]:
+        # A node without a sibling is paired with itself
+        proof.append(level[min(index ^ 1, len(level) - 1)])
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: bytes, proof: list[bytes], root: bytes) -> bool:
+    """Checks that the proof links the leaf to the root."""
+    node = leaf
+    for sibling in proof:
+        node = _hash_pair(node, sibling)
+    return node == root
+
+
+def root_typed_data(root_hex: str, merchant_address: str, chain_id: int) -> dict[str, Any]:
+    """The EIP-712 payload signed for a batch root."""
+    return {
+        "types": CART_BATCH_TYPES,
+        "domain": {"name": CART_BATCH_DOMAIN_NAME, "version": "1", "chainId": chain_id},
+        "primaryType": "CartBatch",
+        "message": {"root": root_hex, "merchant": merchant_address},
+    }
+
+
+@functools.lru_cache(maxsize=1024)
+def recover_root_signer(
+    root_hex: str, merchant_address: str, chain_id: int, signature: str
+) -> str:
+    """Recovers the address that signed a root. Cached per batch."""
+    message = encode_typed_data(
+        full_message=root_typed_data(root_hex, merchant_address, chain_id)
+    )
+    return Account.recover_message(message, signature=signature)
+
+
+def is_merkle_authorization(authorization: Any) -> TypeGuard[str]:
+    """Returns True if a merchant_authorization is a Merkle batch authorization."""
+    if not isinstance(authorization, str) or not authorization.startswith("{"):
+        return False
+    try:
+        return codec.loads(authorization).get("alg") == MERKLE_AUTHORIZATION_ALG
+    except (ValueError, AttributeError):
+        return False
+
+
+def cart_authorization_signer(
+    payload: str | bytes | dict,
+    authorization: str,
+    merchant_address: str,
+    chain_id: int,
+) -> str | None:
+    """
+    Checks a Merkle merchant_authorization for a signed cart payload and
+    returns the address that signed its root.
+
+    Only the inclusion proof is checked per cart; the root signature is
+    recovered once per batch and then served from cache.
+
+    Args:
+        payload: The signed cart payload
+        authorization: The cart's merchant_authorization
+        merchant_address: The payee the cart pays (its payTo)
+        chain_id: The chain the cart is paid on
+
+    Returns:
+        The root signer, or None if the proof or the merchant and chain
+        bound to the root do not match
+    """
+    try:
+        auth = codec.loads(authorization)
+        if auth.get("alg") != MERKLE_AUTHORIZATION_ALG:
+            return None
+        if (
+            auth["merchant"].lower() != merchant_address.lower()
+            or int(auth["chain_id"]) != chain_id
+        ):
+            return None
+        root = bytes.fromhex(auth["root"].removeprefix("0x"))
+        proof = [bytes.fromhex(p.removeprefix("0x")) for p in auth["proof"]]
+        if not verify_proof(cart_leaf(payload), proof, root):
+            return None
+        return recover_root_signer(
+            auth["root"], auth["merchant"], chain_id, auth["signature"]
+        )
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def verify_cart_authorization(
+    payload: str | bytes | dict,
+    authorization: str,
+    merchant_address: str,
+    chain_id: int,
+    signer_address: str,
+) -> bool:
+    """Verifies a Merkle merchant_authorization against the expected root signer."""
+    signer = cart_authorization_signer(payload, authorization, merchant_address, chain_id)
+    return signer is not None and signer.lower() == signer_address.lower()
+
+
+class MerkleBatchAuthorizer:
+    """
+    Collects cart payloads created within a short window and authorizes them
+    all with a single signature over their Merkle root.
+    """
+
+    def __init__(
+        self,
+        signer: Signer,
+        merchant_address: str,
+        chain_id: int,
+        window_seconds: float = 0.05,
+        max_batch_size: int = 256,
+    ):
+        """
+        Initialize the authorizer.
+
+        Args:
+            signer: Signer used for the root signature
+            merchant_address: Payee address the carts pay, bound to each root
+            chain_id: Chain the carts are paid on, bound to each root
+            window_seconds: How long to collect carts before signing a root
+            max_batch_size: Sign immediately once this many carts are queued
+        """
+        self._signer = signer
+        self._merchant_address = merchant_address
+        self._chain_id = chain_id
+        self._window_seconds = window_seconds
+        self._max_batch_size = max_batch_size
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    async def authorize(self, payload: str) -> str:
+        """
+        Queues a cart payload and waits for its merchant_authorization.
+
+        Args:
+            payload: The canonical cart text being authorized
+                (CanonicalPayload.text)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Hands the queued carts to a background root-signing task."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # The batch serves several carts, so it runs outside any one
+        # caller's context (and deadline)
+        task = asyncio.get_running_loop().create_task(
+            self._sign_batch(batch), context=contextvars.Context()
+        )
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _sign_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        """Signs the batch root and resolves each cart with its proof."""
+        levels = build_levels([cart_leaf(payload) for payload, _ in batch])
+        root_hex = "0x" + levels[-1][0].hex()
+        try:
+            signature_data: dict[str, Any] = await self._signer.sign(
+                root_typed_data(root_hex, self._merchant_address, self._chain_id)
+            )
+            signature = signature_data.get("signature")
+            if not signature:
+                raise WalletSigningError("Wallet returned no signature for Merkle root")
+        except Exception as e:
+            logger.exception("Signing Merkle root for %d carts failed", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.info(f"Authorized {len(batch)} carts with one Merkle root signature.")
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            future.set_result(
+                codec.dumps_str(
+                    {
+                        "alg": MERKLE_AUTHORIZATION_ALG,
+                        "root": root_hex,
+                        "proof": ["0x" + p.hex() for p in merkle_proof(levels, index)],
+                        "merchant": self._merchant_address,
+                        "chain_id": self._chain_id,
+                        "signature": signature,
+                    }
+                )
+            )
@@ -0,0 +1,223 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pluggable signer backends selected by LOCAL_WALLET_URL."""
+
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from eth_account import Account
+
+from common import codec, deadline, signing
+from common.backends import create_backend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WALLET_URL = "http://localhost:5001"
+
+# Environment variable holding the key for inproc:// signers
+DEFAULT_KEY_ENV = "CLIENT_PRIVATE_KEY"
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Wallet request timeout in seconds, shortened by the calling task's deadline
+WALLET_TIMEOUT_SECONDS = 30.0
+
+
+class WalletSigningError(Exception):
+    """Raised when the wallet fails to sign a payload."""
+
+
+class Signer(ABC):
+    """
+    Abstract signer used by the agents.
+
+    Results follow the wallet service contract: sign returns
+    {"signature", "address"}, and sign_many returns one entry per payload,
+    each either {"signature", "address"} or {"error"}. Signatures of mandate
+    (non-EIP-712) payloads also carry "signed_message", the exact text
+    signed.
+    """
+
+    @abstractmethod
+    async def get_address(self) -> str:
+        """Returns the public address of the wallet."""
+
+    @abstractmethod
+    async def sign(self, payload: Any) -> dict[str, Any]:
+        """Signs one payload (EIP-712 typed data or a mandate payload)."""
+
+    @abstractmethod
+    async def sign_many(self, payloads: list[Any]) -> list[dict[str, Any]]:
+        """Signs several payloads at once."""
+
+    async def aclose(self) -> None:
+        """Releases any resources held by the signer."""
+
+
+class HttpSigner(Signer):
+    """
+    Signs through the local wallet service over HTTP, either on TCP or on a
+    Unix domain socket when `uds` is given.
+    """
+
+    def __init__(
+        self,
+        wallet_url: str,
+        http_client: httpx.AsyncClient | None = None,
+        uds: str | None = None,
+    ):
+        self._wallet_url = wallet_url.rstrip("/")
+        self._uds = uds
+        # A shared client cannot be reused for a socket transport
+        self._client = http_client if uds is None else None
+        self._owns_client = self._client is None
+
+    @classmethod
+    def from_unix_url(cls, url: str) -> "HttpSigner":
+        """Creates a signer for a unix:///path/to/wallet.sock URL."""
+        path = urlsplit(url).path
+        if not path:
+            raise ValueError(f"Missing socket path in LOCAL_WALLET_URL: {url}")
+        return cls("http://localhost", uds=path)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            transport = (
+                httpx.AsyncHTTPTransport(uds=self._uds) if self._uds else None
+            )
+            self._client = httpx.AsyncClient(
+                timeout=WALLET_TIMEOUT_SECONDS, transport=transport
+            )
+        return self._client
+
+    async def get_address(self) -> str:
+        response = await self._get_client().get(
+            f"{self._wallet_url}/address", timeout=deadline.timeout(WALLET_TIMEOUT_SECONDS)
+        )
+        response.raise_for_status()
+        return codec.loads(response.content).get("address")
+
+    async def _post(self, path: str, body: Any) -> Any:
+        response = await self._get_client().post(
+            f"{self._wallet_url}{path}",
+            content=codec.dumps(body),
+            headers=_JSON_HEADERS,
+            timeout=deadline.timeout(WALLET_TIMEOUT_SECONDS),
+        )
+        response.raise_for_status()
+        return codec.loads(response.content)
+
+    async def sign(self, payload: Any) -> dict[str, Any]:
+        return await self._post("/sign", payload)
+
+    async def sign_many(self, payloads: list[Any]) -> list[dict[str, Any]]:
+        data = await self._post("/sign/batch", {"payloads": payloads})
+        address = data.get("address")
+        return [
+            {**result, "address": address} if "signature" in result else result
+            for result in data.get("results", [])
+        ]
+
+    async def aclose(self) -> None:
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class InProcessSigner(Signer):
+    """
+    Signs with a key held in this process, skipping the wallet service.
+
+    Signing runs in a worker thread so it does not block the event loop.
+    """
+
+    def __init__(self, private_key: str):
+        self._account = Account.from_key(private_key)
+        self._backend = create_backend(self._account)
+
+    @classmethod
+    def from_url(cls, url: str) -> "InProcessSigner":
+        """
+        Creates a signer from an inproc:// URL. The optional host part names
+        the environment variable holding the key (default CLIENT_PRIVATE_KEY).
+        """
+        key_env = urlsplit(url).netloc or DEFAULT_KEY_ENV
+        private_key = os.environ.get(key_env)
+        if not private_key:
+            raise ValueError(
+                f"{key_env} environment variable not set. "
+                "It is required for the in-process signer."
+            )
+        return cls(private_key)
+
+    async def get_address(self) -> str:
+        return self._account.address
+
+    async def sign(self, payload: Any) -> dict[str, Any]:
+        signature = await asyncio.to_thread(signing.sign_payload, self._backend, payload)
+        return self._result(payload, signature)
+
+    def _result(self, payload: Any, signature: str) -> dict[str, Any]:
+        result = {"signature": signature, "address": self._account.address}
+        message = signing.signed_message(payload)
+        if message is not None:
+            result["signed_message"] = message
+        return result
+
+    async def sign_many(self, payloads: list[Any]) -> list[dict[str, Any]]:
+        return await asyncio.to_thread(self._sign_many_sync, payloads)
+
+    def _sign_many_sync(self, payloads: list[Any]) -> list[dict[str, Any]]:
+        results = []
+        for payload in payloads:
+            try:
+                signature = signing.sign_payload(self._backend, payload)
+                results.append(self._result(payload, signature))
+            except Exception as e:
+                logger.exception("Failed to sign batch item")
+                results.append({"error": str(e)})
+        return results
+
+
+def create_signer(
+    wallet_url: str | None = None,
+    http_client: httpx.AsyncClient | None = None,
+) -> Signer:
+    """
+    Creates the signer backend for a wallet URL.
+
+    Args:
+        wallet_url: http(s):// for the wallet service, unix:///path for the
+            wallet service on a Unix domain socket, or inproc:// to sign in
+            this process. Defaults to LOCAL_WALLET_URL.
+        http_client: Optional shared client for HTTP backends
+    """
+    url = wallet_url or os.getenv("LOCAL_WALLET_URL") or DEFAULT_WALLET_URL
+    if not isinstance(url, str):
+        raise ValueError(  # noqa: TRY004 - reported like the other bad URLs
+            f"LOCAL_WALLET_URL must be a URL string, got {url!r}"
+        )
+    scheme = urlsplit(url).scheme
+    if scheme == "inproc":
+        return InProcessSigner.from_url(url)
+    if scheme == "unix":
+        return HttpSigner.from_unix_url(url)
+    if scheme in ("http", "https"):
+        return HttpSigner(url, http_client)
+    raise ValueError(f"Unsupported LOCAL_WALLET_URL scheme: {url}")
@@ -0,0 +1,166 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Signing primitives shared by the wallet service and its clients."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from eth_account import Account
+from eth_account.messages import SignableMessage, encode_defunct
+from eth_utils import keccak
+
+from common import codec, logs
+from common.backends import SigningBackend, create_backend
+from common.canonical import canonical_json
+from common.typed_data import encode_typed_data_cached
+
+# Keys that mark a payload as EIP-712 typed data
+EIP712_KEYS = ("types", "domain", "message", "primaryType")
+
+
+def is_typed_data(payload: Any) -> bool:
+    """Returns True if the payload is structured for EIP-712 signing."""
+    return isinstance(payload, dict) and all(key in payload for key in EIP712_KEYS)
+
+
+def encode_payload(payload: Any) -> SignableMessage:
+    """
+    Encodes a payload into a signable message.
+
+    EIP-712 typed data payloads (for transactions) are encoded as typed data.
+    Everything else (for mandates) is signed as a personal message; the
+    payload may be nested under a "payload" key.
+    """
+    if is_typed_data(payload):
+        return encode_typed_data_cached(payload)
+    return encode_defunct(text=personal_message_text(payload))
+
+
+def personal_message_text(payload: Any) -> str:
+    """
+    Returns the exact text signed for a non-EIP-712 (mandate) payload.
+
+    Strings (usually CanonicalPayload.text) are signed as they are. Objects
+    are signed as their canonical JSON, so the signature matches the one
+    for the same mandate sent as canonical text.
+    """
+    actual_payload = payload.get("payload", payload) if isinstance(payload, dict) else payload
+    if isinstance(actual_payload, dict):
+        return canonical_json(actual_payload).decode("utf-8")
+    return actual_payload
+
+
+def signed_message(payload: Any) -> str | None:
+    """
+    Returns the exact text a mandate payload is signed as, or None for
+    EIP-712 typed data. The wallet echoes it so a caller that sent an object
+    can store the bytes its signature covers.
+    """
+    if is_typed_data(payload):
+        return None
+    return personal_message_text(payload)
+
+
+def hash_signable(message: SignableMessage) -> bytes:
+    """Returns the EIP-191 hash that gets signed for a signable message."""
+    return keccak(b"\x19" + message.version + message.header + message.body)
+
+
+def sign_payload(backend: SigningBackend, payload: Any) -> str:
+    """Signs a payload and returns the 0x-prefixed hex signature."""
+    signature = backend.sign_hash(hash_signable(encode_payload(payload)))
+    return "0x" + signature.hex()
+
+
+class SignatureCache:
+    """
+    Bounded LRU/TTL cache of signatures keyed by a digest of the signing mode
+    and the canonical payload.
+
+    Signing is deterministic (RFC 6979), so re-sending an identical payload
+    (e.g. an A2A retry) can safely return the stored signature.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 600.0):
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(payload: Any) -> str:
+        """
+        Digest of the signing mode and canonical payload.
+
+        EIP-712 payloads are canonicalized with sorted keys, which does not
+        change their hash. Personal messages are keyed by the exact text that
+        gets signed.
+        """
+        if is_typed_data(payload):
+            canonical = b"eip712:" + codec.dumps(payload, sort_keys=True, default=repr)
+        else:
+            text = personal_message_text(payload)
+            canonical = b"personal:" + (text if isinstance(text, str) else repr(text)).encode()
+        return hashlib.sha256(canonical).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached signature, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, signature: str) -> None:
+        """Stores a signature, evicting the least recently used entries."""
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, signature)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Returns hit/miss counters and the current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+# Backend used by process-pool workers, set once per worker by init_worker
+_worker_backend: SigningBackend | None = None
+
+
+def init_worker(private_key: str) -> None:
+    """Process-pool initializer that loads the signing key in each worker."""
+    global _worker_backend
+    logs.configure_worker()
+    _worker_backend = create_backend(Account.from_key(private_key))
+
+
+def sign_in_worker(payload: Any) -> str:
+    """Signs a payload with the worker's backend. Runs inside a pool worker."""
+    if _worker_backend is None:
+        raise RuntimeError("Signing worker not initialized; call init_worker first.")
+    return sign_payload(_worker_backend, payload)
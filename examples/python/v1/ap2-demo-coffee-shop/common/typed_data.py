@@ -0,0 +1,155 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Precompiled EIP-712 domain separators and struct type hashes."""
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from eth_abi import encode
+from eth_account.messages import SignableMessage, encode_typed_data
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from common import codec
+
+encode_field: Callable[..., tuple[str, Any]] | None
+try:
+    from eth_account._utils.encode_typed_data.encoding_and_hashing import (
+        encode_field,
+        get_primary_type,
+        hash_domain,
+        hash_type,
+    )
+except ImportError:  # Internal layout changed; fall back to encode_typed_data
+    encode_field = None
+
+# Number of distinct (domain, types) pairs kept compiled
+EIP712_CACHE_SIZE = int(os.environ.get("WALLET_EIP712_CACHE_SIZE", "128"))
+
+
+@dataclass(frozen=True)
+class CompiledTypedData:
+    """Everything about a typed-data payload that does not depend on the message."""
+
+    domain_separator: bytes
+    primary_type: str
+    type_hash: bytes
+    types: dict[str, list[dict[str, str]]]
+
+    def hash_message(self, message: dict[str, Any]) -> bytes:
+        """Hashes the message struct using the precomputed type hash."""
+        encoded_types: list[str] = ["bytes32"]
+        encoded_values: list[Any] = [self.type_hash]
+        assert encode_field is not None, "compiled without eth_account internals"
+        for field in self.types[self.primary_type]:
+            field_type, value = encode_field(
+                self.types, field["name"], field["type"], message.get(field["name"])
+            )
+            encoded_types.append(field_type)
+            encoded_values.append(value)
+        return bytes(keccak(encode(encoded_types, encoded_values)))
+
+
+def compile_typed_data(payload: dict[str, Any]) -> CompiledTypedData:
+    """
+    Validates the domain and types of a typed-data payload the same way
+    encode_typed_data does, and precomputes the domain separator and the
+    primary type hash.
+    """
+    types = dict(payload["types"])
+    domain = payload["domain"]
+
+    if "EIP712Domain" in types:
+        domain_types_keys = {field["name"] for field in types["EIP712Domain"]}
+        if set(domain.keys()) != domain_types_keys:
+            raise ValueError(
+                "The fields provided in `domain` do not match the fields provided "
+                "in `types.EIP712Domain`."
+            )
+    types.pop("EIP712Domain", None)
+
+    primary_type = get_primary_type(types)
+    if payload["primaryType"] != primary_type:
+        raise ValueError(
+            f"The provided `primaryType` `{payload['primaryType']}` does not match "
+            f"the derived `primaryType` `{primary_type}`."
+        )
+
+    return CompiledTypedData(
+        domain_separator=hash_domain(domain),
+        primary_type=primary_type,
+        type_hash=hash_type(primary_type, types),
+        types=types,
+    )
+
+
+class TypedDataCache:
+    """Thread-safe LRU cache of compiled typed data keyed by (domain, types)."""
+
+    def __init__(self, maxsize: int = EIP712_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[bytes, CompiledTypedData] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(payload: dict[str, Any]) -> bytes:
+        return codec.dumps(
+            [payload["domain"], payload["types"], payload["primaryType"]],
+            sort_keys=True,
+            default=repr,
+        )
+
+    def get(self, payload: dict[str, Any]) -> CompiledTypedData:
+        """Returns the compiled form of the payload's domain and types."""
+        key = self._key(payload)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                return compiled
+
+        compiled = compile_typed_data(payload)
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        """Drops every compiled entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = TypedDataCache()
+
+
+def encode_typed_data_cached(payload: dict[str, Any]) -> SignableMessage:
+    """
+    Drop-in replacement for encode_typed_data(full_message=payload) that only
+    hashes the message struct per call.
+    """
+    if encode_field is None:
+        return encode_typed_data(full_message=payload)
+    compiled = _cache.get(payload)
+    return SignableMessage(
+        HexBytes(b"\x01"),
+        compiled.domain_separator,
+        compiled.hash_message(payload["message"]),
+    )
@@ -13,27 +13,61 @@
 # limitations under the License.
 """Local wallet service for signing transactions and mandates."""
 
-import json
+import asyncio
+import contextlib
 import logging
 import os
 import traceback
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
+import click
+import uvicorn
 from dotenv import load_dotenv
 from eth_account import Account
-from eth_account.messages import encode_defunct, encode_typed_data
 from flask import Flask, jsonify, request
+from flask.json.provider import JSONProvider
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from common import codec, logs, signing
+from common.backends import create_backend
+from common.signing import is_typed_data
 
 # Load environment variables from .env file
 load_dotenv()
 
+
+class CodecJSONProvider(JSONProvider):
+    """Routes Flask's request parsing and jsonify through common.codec."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return codec.dumps_str(obj)
+
+    def loads(self, s, **kwargs):
+        return codec.loads(s)
+
+
+class CodecJSONResponse(JSONResponse):
+    """Starlette JSON response rendered with common.codec."""
+
+    def render(self, content) -> bytes:
+        return codec.dumps(content)
+
+
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
 
 # --- Setup Logging ---
-logging.basicConfig(level=logging.INFO)
+logs.configure()
 logger = logging.getLogger(__name__)
+# Full /sign request bodies; sample with LOG_SAMPLE_RATES
+request_logger = logging.getLogger("wallet.requests")
 
 # Load private key from environment variable
-__private_key = os.environ.get("CLIENT_PRIVATE_KEY")
+__private_key = os.environ.get("CLIENT_PRIVATE_KEY") or ""
 if not __private_key:
     raise ValueError(
         "CLIENT_PRIVATE_KEY environment variable not set. "
@@ -41,6 +75,44 @@ if not __private_key:
     )
 
 account = Account.from_key(__private_key)
+signing_backend = create_backend(account)
+logger.info(f"Using '{signing_backend.name}' signing backend.")
+
+# Upper bound on payloads accepted by a single /sign/batch request
+MAX_BATCH_SIZE = int(os.environ.get("WALLET_MAX_BATCH_SIZE", "256"))
+
+# Worker pool used to sign batch entries in parallel
+_sign_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("WALLET_SIGN_WORKERS", str(os.cpu_count() or 4))),
+    thread_name_prefix="wallet-sign",
+)
+
+# Signatures of recently signed payloads, reused when a payload is re-sent
+signature_cache = signing.SignatureCache(
+    maxsize=int(os.environ.get("WALLET_SIGNATURE_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("WALLET_SIGNATURE_CACHE_TTL", "600")),
+)
+
+
+def _sign_cached(payload) -> str:
+    """Signs a payload, returning the cached signature for repeated payloads."""
+    key = signature_cache.key_for(payload)
+    signature = signature_cache.get(key)
+    if signature is None:
+        signature = signing.sign_payload(signing_backend, payload)
+        signature_cache.put(key, signature)
+    return signature
+
+
+def _signed(payload, signature: str) -> dict:
+    """
+    A signing result. Mandate payloads also carry the exact text that was
+    signed, which for object payloads is their canonical JSON.
+    """
+    message = signing.signed_message(payload)
+    if message is None:
+        return {"signature": signature}
+    return {"signature": signature, "signed_message": message}
 
 
 @app.route("/address", methods=["GET"])
@@ -49,47 +121,34 @@ def get_address():
     return jsonify({"address": account.address})
 
 
+@app.route("/stats", methods=["GET"])
+def get_stats():
+    """Returns signature cache hit/miss counters."""
+    return jsonify({"signature_cache": signature_cache.stats()})
+
+
 @app.route("/sign", methods=["POST"])
 def sign_payload():
     """
     Signs a payload. It can handle both standard string payloads (for mandates)
-    and EIP-712 typed data payloads (for transactions).
+    and EIP-712 typed data payloads (for transactions). Mandate results also
+    return the exact text signed as "signed_message".
     """
     try:
         payload = request.get_json()
-        logger.info(f"Received request data: {json.dumps(payload, indent=2)}")
+        request_logger.info("Received request data: %s", logs.pretty_json(payload))
 
         if not payload:
             logger.error("Payload not provided in request.")
             return jsonify({"error": "Payload not provided"}), 400
 
-        # Check if the payload is structured for EIP-712 signing
-        if isinstance(payload, dict) and all(
-            key in payload for key in ["types", "domain", "message", "primaryType"]
-        ):
+        if is_typed_data(payload):
             logger.info("Attempting EIP-712 signing...")
-            # Explicitly encode the typed data to get the signable hash
-            signable_message = encode_typed_data(full_message=payload)
-            # Sign the hash
-            signed_message = account.sign_message(signable_message)
-            signature = "0x" + signed_message.signature.hex()
-            logger.info(f"EIP-712 signing successful. Signature: {signature}")
-            return jsonify({"signature": signature, "address": account.address})
         else:
-            # This branch handles signing simple string/JSON payloads (for mandates)
             logger.info("Attempting standard string signing...")
-            # The payload for mandates might be nested, so extract it.
-            actual_payload = payload.get("payload", payload)
-            payload_str = (
-                json.dumps(actual_payload)
-                if isinstance(actual_payload, dict)
-                else actual_payload
-            )
-            message = encode_defunct(text=payload_str)
-            signed_message = account.sign_message(message)
-            signature = "0x" + signed_message.signature.hex()
-            logger.info(f"Standard signing successful. Signature: {signature}")
-            return jsonify({"signature": signature, "address": account.address})
+        signature = _sign_cached(payload)
+        logger.info(f"Signing successful. Signature: {signature}")
+        return jsonify({**_signed(payload, signature), "address": account.address})
 
     except Exception as e:
         logger.error(f"An error occurred in /sign endpoint: {e}")
@@ -97,6 +156,272 @@ def sign_payload():
         return jsonify({"error": "Internal server error during signing."}), 500
 
 
-if __name__ == "__main__":
-    app.run(host="localhost", port=5001)
+def _sign_batch_item(payload):
+    """Signs one batch entry, reporting failures per item instead of raising."""
+    if not payload:
+        return {"error": "Payload not provided"}
+    try:
+        return _signed(payload, _sign_cached(payload))
+    except Exception:
+        logger.exception("Failed to sign batch item")
+        return {"error": "Internal server error during signing."}
+
+
+@app.route("/sign/batch", methods=["POST"])
+def sign_batch():
+    """
+    Signs several payloads in one round trip.
+
+    Expects {"payloads": [...]} where each entry has the same shape as a
+    /sign request body (EIP-712 typed data or a mandate payload). Results are
+    returned in request order, each either {"signature": ...} (plus
+    "signed_message" for mandates) or {"error": ...}.
+    """
+    body = request.get_json(silent=True) or {}
+    payloads = body.get("payloads")
+
+    if not isinstance(payloads, list) or not payloads:
+        logger.error("Batch payloads not provided in request.")
+        return jsonify({"error": "Payloads not provided"}), 400
+    if len(payloads) > MAX_BATCH_SIZE:
+        return (
+            jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} payloads)"}),
+            413,
+        )
+
+    logger.info(f"Signing batch of {len(payloads)} payloads...")
+    results = list(_sign_pool.map(_sign_batch_item, payloads))
+    return jsonify({"results": results, "address": account.address})
+
+
+# --- Async serving mode ---
+
+
+class BoundedSigningPool:
+    """
+    Runs signing work on a process pool with a bounded number of pending
+    payloads. Callers that would exceed the bound are rejected instead of
+    queued, so signing latency cannot grow without limit under load.
+    """
+
+    def __init__(self, private_key: str, workers: int, max_pending: int):
+        self._private_key = private_key
+        self._workers = workers
+        self._max_pending = max_pending
+        self._pending = 0
+        self._pool: ProcessPoolExecutor | None = None
 
+    def start(self) -> None:
+        """Starts the worker processes, each holding its own copy of the key."""
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._workers,
+            initializer=signing.init_worker,
+            initargs=(self._private_key,),
+        )
+        logger.info(f"Started signing pool with {self._workers} workers.")
+
+    def shutdown(self) -> None:
+        """Stops the worker processes, dropping queued work."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def try_acquire(self, count: int = 1) -> bool:
+        """Reserves capacity for `count` payloads; returns False if full."""
+        if self._pending + count > self._max_pending:
+            return False
+        self._pending += count
+        return True
+
+    def release(self, count: int = 1) -> None:
+        """Returns capacity reserved by try_acquire."""
+        self._pending -= count
+
+    async def sign(self, payload) -> str:
+        """Signs one payload on the pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, signing.sign_in_worker, payload)
+
+
+def _busy_response() -> CodecJSONResponse:
+    """503 response telling the caller to back off and retry."""
+    return CodecJSONResponse(
+        {"error": "Signing queue is full. Please retry later."},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
+def create_async_app(workers: int, max_pending: int) -> Starlette:
+    """
+    Creates an ASGI app with the same /address, /sign and /sign/batch
+    contract as the Flask app, signing on a bounded process pool.
+    """
+    pool = BoundedSigningPool(
+        private_key=__private_key, workers=workers, max_pending=max_pending
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        pool.start()
+        try:
+            yield
+        finally:
+            pool.shutdown()
+
+    async def get_address_async(request: Request) -> CodecJSONResponse:
+        """Returns the public address of the wallet."""
+        return CodecJSONResponse({"address": account.address})
+
+    async def get_stats_async(request: Request) -> CodecJSONResponse:
+        """Returns signature cache hit/miss counters."""
+        return CodecJSONResponse({"signature_cache": signature_cache.stats()})
+
+    async def sign_payload_async(request: Request) -> CodecJSONResponse:
+        """Signs a single payload (EIP-712 typed data or mandate string)."""
+        try:
+            payload = codec.loads(await request.body())
+        except codec.JSONDecodeError:
+            payload = None
+        if not payload:
+            logger.error("Payload not provided in request.")
+            return CodecJSONResponse({"error": "Payload not provided"}, status_code=400)
+
+        key = signature_cache.key_for(payload)
+        signature = signature_cache.get(key)
+        if signature is None:
+            if not pool.try_acquire():
+                logger.warning("Signing queue full; rejecting /sign request.")
+                return _busy_response()
+            try:
+                signature = await pool.sign(payload)
+            except Exception:
+                logger.exception("An error occurred in /sign endpoint")
+                return CodecJSONResponse(
+                    {"error": "Internal server error during signing."}, status_code=500
+                )
+            finally:
+                pool.release()
+            signature_cache.put(key, signature)
+
+        logger.info(f"Signing successful. Signature: {signature}")
+        return CodecJSONResponse(
+            {**_signed(payload, signature), "address": account.address}
+        )
+
+    async def sign_batch_async(request: Request) -> CodecJSONResponse:
+        """Signs several payloads in one round trip. See sign_batch."""
+        try:
+            body = codec.loads(await request.body())
+        except codec.JSONDecodeError:
+            body = {}
+        payloads = body.get("payloads") if isinstance(body, dict) else None
+
+        if not isinstance(payloads, list) or not payloads:
+            logger.error("Batch payloads not provided in request.")
+            return CodecJSONResponse({"error": "Payloads not provided"}, status_code=400)
+        if len(payloads) > MAX_BATCH_SIZE:
+            return CodecJSONResponse(
+                {"error": f"Batch too large (max {MAX_BATCH_SIZE} payloads)"},
+                status_code=413,
+            )
+
+        # Serve repeated payloads from the cache; only misses go to the pool
+        keys = [signature_cache.key_for(payload) if payload else None for payload in payloads]
+        cached = [signature_cache.get(key) if key else None for key in keys]
+        to_sign = [
+            payload
+            for payload, key, signature in zip(payloads, keys, cached)
+            if key and signature is None
+        ]
+
+        if not pool.try_acquire(len(to_sign)):
+            logger.warning("Signing queue full; rejecting /sign/batch request.")
+            return _busy_response()
+        try:
+            outcomes = await asyncio.gather(
+                *(pool.sign(payload) for payload in to_sign),
+                return_exceptions=True,
+            )
+        finally:
+            pool.release(len(to_sign))
+
+        signed = iter(outcomes)
+        results = []
+        for payload, key, signature in zip(payloads, keys, cached):
+            if key is None:
+                results.append({"error": "Payload not provided"})
+                continue
+            if signature is None:
+                outcome = next(signed)
+                if isinstance(outcome, BaseException):
+                    logger.error(f"Failed to sign batch item: {outcome}")
+                    results.append({"error": "Internal server error during signing."})
+                    continue
+                signature = outcome
+                signature_cache.put(key, signature)
+            results.append(_signed(payload, signature))
+
+        logger.info(f"Signed batch of {len(payloads)} payloads.")
+        return CodecJSONResponse({"results": results, "address": account.address})
+
+    return Starlette(
+        routes=[
+            Route("/address", get_address_async, methods=["GET"]),
+            Route("/stats", get_stats_async, methods=["GET"]),
+            Route("/sign", sign_payload_async, methods=["POST"]),
+            Route("/sign/batch", sign_batch_async, methods=["POST"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+@click.command()
+@click.option("--host", default="localhost", help="Host to bind to")
+@click.option("--port", default=5001, help="Port to bind to")
+@click.option(
+    "--uds",
+    default=None,
+    help="Listen on this Unix domain socket path instead of host/port",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(["dev", "async"]),
+    default="dev",
+    help="dev: Flask development server. async: uvicorn with a signing process pool.",
+)
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 4,
+    help="Signing worker processes (async mode)",
+)
+@click.option(
+    "--max-pending",
+    default=256,
+    help="Payloads allowed in flight before returning 503 (async mode)",
+)
+def main(
+    host: str, port: int, uds: str | None, mode: str, workers: int, max_pending: int
+):
+    """Run the local wallet service."""
+    if uds and os.path.exists(uds):
+        # Remove a stale socket left by a previous run
+        os.unlink(uds)
+
+    if mode == "async":
+        uvicorn.run(
+            create_async_app(workers=workers, max_pending=max_pending),
+            host=host,
+            port=port,
+            uds=uds,
+            log_level="info",
+        )
+    elif uds:
+        # Werkzeug binds an AF_UNIX socket for unix:// hosts
+        app.run(host=f"unix://{uds}")
+    else:
+        app.run(host=host, port=port)
+
+
+if __name__ == "__main__":
+    main()
@@ -23,19 +23,25 @@ from dotenv import load_dotenv
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import PlainTextResponse
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 from starlette.routing import Route
 
+from common import logs
+from server.agents.menu import (
+    DEFAULT_BEAN,
+    DEFAULT_SIZE,
+    format_price_usd,
+    get_catalog,
+    get_menu_document,
+)
 from server.agents.routes import create_agent_routes
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+logs.configure()
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +50,8 @@ async def homepage(request):
     return PlainTextResponse(
         "☕ AI Coffee Shop Server\n\n"
         "Available endpoints:\n"
+        "  - /menu (menu JSON, no LLM)\n"
+        "  - /quote?drink=...&size=...&bean=... (price quote, no LLM)\n"
         "  - /agents/coffee_shop_agent/.well-known/agent-card.json\n"
         "  - /agents/coffee_shop_agent (A2A RPC endpoint)\n\n"
         "Use the client agent to place orders!"
@@ -55,6 +63,83 @@ async def health_check(request):
     return PlainTextResponse("OK")
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Checks an If-None-Match header against an ETag: "*" matches anything,
+    otherwise one of the comma-separated tags must equal it, with weak (W/)
+    prefixes ignored.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def menu(request: Request) -> Response:
+    """Serves the pre-serialized menu with ETag-based caching."""
+    body, etag = get_menu_document()
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def quote(request: Request) -> JSONResponse:
+    """
+    Prices drink configurations without going through the agent.
+
+    GET  /quote?drink=아메리카노&size=Grande&bean=디카페인
+    POST /quote {"items": [{"drink": ..., "size": ..., "bean": ...}, ...]}
+    """
+    if request.method == "POST":
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": "Invalid JSON body"}, status_code=400)
+        items = body.get("items") if isinstance(body, dict) else body
+    else:
+        items = [dict(request.query_params)]
+
+    if not isinstance(items, list) or not items:
+        return JSONResponse({"error": "No items to quote"}, status_code=400)
+
+    catalog = get_catalog()
+    try:
+        configs = [
+            catalog.normalize(
+                item["drink"], item.get("size", DEFAULT_SIZE), item.get("bean", DEFAULT_BEAN)
+            )
+            for item in items
+        ]
+        prices = catalog.quote_many(configs)
+    except (KeyError, TypeError, AttributeError):
+        return JSONResponse({"error": "Each item needs a 'drink'"}, status_code=400)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    total = sum(prices)
+    return JSONResponse(
+        {
+            "quotes": [
+                {
+                    "drink": drink,
+                    "size": size,
+                    "bean": bean,
+                    "price_micro": price,
+                    "price_usd": format_price_usd(price),
+                }
+                for (drink, size, bean), price in zip(configs, prices)
+            ],
+            "total_micro": total,
+            "total_usd": format_price_usd(total),
+            "catalog_version": catalog.version,
+        }
+    )
+
+
 def create_app(host: str, port: int) -> Starlette:
     """Creates and configures the Starlette application."""
     base_url = f"http://{host}:{port}"
@@ -86,6 +171,8 @@ def create_app(host: str, port: int) -> Starlette:
     routes = [
         Route("/", homepage),
         Route("/health", health_check),
+        Route("/menu", menu, methods=["GET"]),
+        Route("/quote", quote, methods=["GET", "POST"]),
     ]
 
     app = Starlette(
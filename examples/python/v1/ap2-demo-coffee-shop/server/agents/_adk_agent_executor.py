@@ -13,11 +13,14 @@
 # limitations under the License.
 """ADK Agent Executor for running ADK-based agents in A2A context."""
 
+import asyncio
+import functools
 import inspect
-import json
 import logging
-from collections.abc import AsyncGenerator
-from typing import Any, Dict
+import os
+from collections.abc import AsyncGenerator, Callable
+from dataclasses import dataclass
+from typing import Any, TypeGuard
 
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
@@ -28,22 +31,39 @@ from a2a.types import (
     DataPart,
     Part,
     TaskState,
-    UnsupportedOperationError,
+    TextPart,
 )
-from a2a.utils.errors import ServerError
 from google.adk import Runner
+from google.adk.agents.invocation_context import LlmCallsLimitExceededError
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.a2a.converters.part_converter import (
     convert_a2a_part_to_genai_part,
     convert_genai_part_to_a2a_part,
 )
-from google.adk.events import Event
+from google.adk.events import Event, EventActions
+from google.adk.sessions import Session
 from google.genai import types
 
 from x402_a2a.core.utils import x402Utils
 from x402_a2a.types import x402PaymentRequiredException
 
+from common import codec, deadline, logs
+
+from . import compaction
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+# Message, task and session blocks; sample with LOG_SAMPLE_RATES
+message_logger = logging.getLogger("executor.messages")
+
+# Maps structured client data and the session state to a direct tool call
+MandateRouter = Callable[[dict[str, Any], dict[str, Any]], tuple[str, dict[str, Any]] | None]
+
+# How long cancel waits for a run to unwind (close the model stream, cancel
+# its tool calls and their HTTP requests) before reporting the task canceled
+CANCEL_GRACE_SECONDS = 5.0
+
+# Model turns (each followed by its tool calls) a task may take before it fails
+DEFAULT_MAX_TURNS = 8
 
 
 def _to_serializable(obj: Any) -> Any:
@@ -77,16 +97,262 @@ def _serialize_parts(parts: list[Any]) -> list[Any]:
 def _safe_json(payload: Any) -> str:
     """Safely dumps payload to JSON for readable logs."""
     try:
-        return json.dumps(payload, ensure_ascii=False, indent=2)
+        return codec.dumps_str(payload, indent=True)
     except Exception:
         try:
-            return json.dumps(_to_serializable(payload), ensure_ascii=False, indent=2)
+            return codec.dumps_str(_to_serializable(payload), indent=True)
         except Exception:
             return str(payload)
 
 
+@dataclass(frozen=True)
+class _ToolEntry:
+    """A tool function with its call style resolved once."""
+
+    func: Callable[..., Any]
+    is_async: bool
+
+
+def _build_tool_table(tools: list[Any]) -> dict[str, _ToolEntry]:
+    """Indexes tool functions by name. The first tool wins on duplicate names."""
+    table: dict[str, _ToolEntry] = {}
+    for tool in tools:
+        name = getattr(tool, "__name__", None)
+        if name and name not in table:
+            table[name] = _ToolEntry(func=tool, is_async=inspect.iscoroutinefunction(tool))
+    return table
+
+
+def _in_thread(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a sync function as a coroutine function that runs it in a worker thread."""
+
+    @functools.wraps(func)
+    async def run(*args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return run
+
+
+def offload_sync_tools(tools: list[Any]) -> list[Any]:
+    """
+    Returns the agent tools with plain sync functions moved to a worker
+    thread. ADK runs the tool calls of one model reply concurrently, but
+    calls sync functions on the event loop, where they block each other
+    and every other task. The wrappers keep the name, docstring and
+    signature ADK declares the tool with.
+    """
+    return [
+        _in_thread(tool)
+        if (inspect.isfunction(tool) or inspect.ismethod(tool))
+        and not inspect.iscoroutinefunction(tool)
+        else tool
+        for tool in tools
+    ]
+
+
+def _structured_data(parts: list[Part]) -> list[dict[str, Any]]:
+    """Returns the JSON objects carried by DataParts or JSON TextParts."""
+    found = []
+    for part in parts or []:
+        root = part.root
+        if isinstance(root, DataPart) and isinstance(root.data, dict):
+            found.append(root.data)
+        elif isinstance(root, TextPart) and root.text.lstrip().startswith("{"):
+            try:
+                data = codec.loads(root.text)
+            except codec.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                found.append(data)
+    return found
+
+
+def _is_artifact_response(response_data: Any) -> TypeGuard[dict[str, Any]]:
+    """True for tool results that carry an A2A artifact (e.g. a CartMandate)."""
+    return (
+        isinstance(response_data, dict)
+        and "artifact" in response_data
+        and "artifactId" in response_data["artifact"]
+        and "parts" in response_data["artifact"]
+    )
+
+
+def _is_plain_text(part: types.Part) -> bool:
+    return part.text is not None and not part.thought and part == types.Part(text=part.text)
+
+
+def _merge_text_parts(parts: list[types.Part]) -> list[types.Part]:
+    """Joins adjacent plain text parts, e.g. the chunks of a streamed reply."""
+    merged: list[types.Part] = []
+    for part in parts:
+        if merged and _is_plain_text(part) and _is_plain_text(merged[-1]):
+            merged[-1] = types.Part(text=(merged[-1].text or "") + (part.text or ""))
+        else:
+            merged.append(part)
+    return merged
+
+
+class _StatusCoalescer:
+    """
+    Buffers a task's intermediate model output and publishes it as one
+    working status update per interval or per max_events events, instead of
+    one update (and one parts conversion) per event.
+
+    Callers flush before any other task update (artifacts, completion,
+    payment required, cancellation) so updates keep their order. With an
+    interval of 0 every event is published immediately.
+    """
+
+    def __init__(self, task_updater: TaskUpdater, interval: float, max_events: int):
+        self._task_updater = task_updater
+        self._interval = interval
+        self._max_events = max_events
+        self._parts: list[types.Part] = []
+        self._events = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._timer_flushes: set[asyncio.Task] = set()
+        # Serializes flushes, so a timer flush never overtakes an inline one
+        self._lock = asyncio.Lock()
+
+    async def add(self, parts: list[types.Part]) -> None:
+        """Buffers one event's parts, publishing them if a limit is reached."""
+        self._parts.extend(parts)
+        self._events += 1
+        if self._interval <= 0 or self._events >= self._max_events:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self._interval, self._flush_from_timer
+            )
+
+    def _flush_from_timer(self) -> None:
+        self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._timer_flushes.add(task)
+        task.add_done_callback(self._timer_flushes.discard)
+
+    async def flush(self) -> None:
+        """Publishes everything buffered so far as one working status update."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._parts:
+                return
+            parts, self._parts, self._events = self._parts, [], 0
+            await self._task_updater.update_status(
+                TaskState.working,
+                message=self._task_updater.new_agent_message(
+                    convert_genai_parts_to_a2a(_merge_text_parts(parts)),
+                ),
+            )
+
+    def close(self) -> None:
+        """Drops the pending timer; buffered parts are discarded."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._parts = []
+
+
+class _RequestSession:
+    """
+    Read-through, write-behind view of the ADK session for one request.
+
+    The session is read once and then served from memory. State saved by
+    tools is applied to that copy at once and persisted as one
+    state_delta event on flush, which runs before each model turn (the
+    runner reads the session from the service) and before the task
+    reaches a final state.
+    """
+
+    def __init__(self, runner: Runner, session_id: str):
+        self._service = runner.session_service
+        self._app_name = runner.app_name
+        self._author = runner.agent.name
+        self._session_id = session_id
+        self._session: Session | None = None
+        self._stale = False
+        self._pending: dict[str, Any] = {}
+        # Summaries of order cycles this request finished
+        self._cycle_summaries: list[str] = []
+        self.created = False
+
+    @property
+    def id(self) -> str:
+        return self._session_id
+
+    async def get(self) -> Session:
+        """Returns the session, reading (or creating) it on first use."""
+        if self._session is None:
+            self._session = await self._service.get_session(
+                app_name=self._app_name, user_id="self", session_id=self._session_id
+            )
+            if self._session is None:
+                self._session = await self._service.create_session(
+                    app_name=self._app_name, user_id="self", session_id=self._session_id
+                )
+                self.created = True
+        return self._session
+
+    async def update(self, state_delta: dict[str, Any]) -> None:
+        """Applies state_delta now and queues it for the next flush."""
+        (await self.get()).state.update(state_delta)
+        self._pending.update(state_delta)
+
+    def close_cycle(self, summary: str) -> None:
+        """Notes that this request finished an order cycle."""
+        self._cycle_summaries.append(summary)
+
+    async def compact_cycles(self) -> None:
+        """Replaces the history of the order cycles this request finished by their summaries."""
+        if not self._cycle_summaries:
+            return
+        summaries, self._cycle_summaries = self._cycle_summaries, []
+        if self._stale:
+            self._session = None
+            self._stale = False
+        session = await self.get()
+        logger.info(f"Compacting finished order cycle of session {self._session_id}")
+        await self._service.append_event(
+            session, compaction.cycle_compaction(self._author, session.events, summaries)
+        )
+
+    async def enforce_budget(self, policy: compaction.CompactionPolicy) -> None:
+        """Compacts the whole history if the model would see more than policy allows."""
+        session = await self.get()
+        if compaction.over_budget(policy, session.events):
+            logger.info(f"Session {self._session_id} is over its history budget; compacting")
+            for event in compaction.budget_compaction(self._author, session.events, policy):
+                await self._service.append_event(session, event)
+
+    def mark_stale(self) -> None:
+        """Notes that a runner turn wrote to the stored session."""
+        self._stale = True
+
+    async def flush(self) -> None:
+        """Persists the queued state changes as one event."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        if self._stale:
+            # Services that check update times reject writes through a copy
+            # read before the runner's own events
+            self._session = None
+            self._stale = False
+        await self._service.append_event(
+            await self.get(),
+            Event(author=self._author, actions=EventActions(state_delta=pending)),
+        )
+
+
 def _format_block(title: str, payload: Any) -> str:
-    """Formats a log block matching the requested style."""
+    """
+    Formats a log block matching the requested style. payload may be a
+    callable that builds it.
+    """
+    if callable(payload):
+        payload = payload()
     body = payload if isinstance(payload, str) else _safe_json(payload)
     return (
         "\n------------------------------\n\n"
@@ -96,212 +362,345 @@ def _format_block(title: str, payload: Any) -> str:
     )
 
 
+def _log_block(title: str, payload: Any) -> None:
+    """Logs a block, formatted only if the record is emitted."""
+    message_logger.info("%s", logs.lazy(_format_block, title, payload))
+
+
 class ADKAgentExecutor(AgentExecutor):
     """An AgentExecutor that runs an ADK-based Agent."""
 
-    def __init__(self, runner: Runner, card: AgentCard):
+    def __init__(
+        self,
+        runner: Runner,
+        card: AgentCard,
+        mandate_router: MandateRouter | None = None,
+        fast_path: str | None = None,
+        status_interval: float | None = None,
+        status_max_events: int | None = None,
+        task_timeout: float | None = None,
+        max_turns: int | None = None,
+        compaction_policy: compaction.CompactionPolicy | None = None,
+    ):
         self.runner = runner
         self._card = card
-        self._running_sessions: Dict[str, Any] = {}
+        # Dispatch table of the agent's tools, built once per runner
+        self._tools = _build_tool_table(runner.agent.tools)
+        # In-flight runs by context id, then task id, so cancel can stop them
+        self._running_sessions: dict[str, dict[str, asyncio.Task]] = {}
         self.x402 = x402Utils()
+        self._mandate_router = mandate_router
+        # Structured mandates bypass the LLM's tool choice: "llm" runs the
+        # tool directly and lets the LLM write the closing message, "direct"
+        # skips the LLM entirely, "off" sends everything to the LLM.
+        self._fast_path = fast_path or os.getenv("MANDATE_FAST_PATH", "llm")
+        # Intermediate status updates are coalesced over this many seconds or
+        # events; 0 publishes every model event as its own update.
+        self._status_interval = (
+            status_interval
+            if status_interval is not None
+            else int(os.getenv("STATUS_COALESCE_INTERVAL_MS", "0")) / 1000
+        )
+        self._status_max_events = status_max_events or int(
+            os.getenv("STATUS_COALESCE_MAX_EVENTS", "32")
+        )
+        # Every task runs against a deadline (the request's timeout_seconds,
+        # capped at this) and a turn budget, so a runaway conversation
+        # cannot hold a worker indefinitely.
+        self._task_timeout = task_timeout or deadline.default_task_timeout()
+        self._max_turns = max_turns or int(os.getenv("AGENT_MAX_TURNS", DEFAULT_MAX_TURNS))
+        # The runner runs the agent's own model and tool loop within one
+        # call, so the turn budget also caps the model calls it makes.
+        # Streaming agents forward model output token by token as working
+        # status updates, which reach streaming clients as SSE events.
+        self._run_config = RunConfig(
+            max_llm_calls=self._max_turns,
+            streaming_mode=(
+                StreamingMode.SSE
+                if card.capabilities and card.capabilities.streaming
+                else StreamingMode.NONE
+            ),
+        )
+        self._compaction = compaction_policy or compaction.CompactionPolicy.from_env()
 
     def _run_agent(
         self, session_id, new_message: types.Content
     ) -> AsyncGenerator[Event, None]:
         return self.runner.run_async(
-            session_id=session_id, user_id="self", new_message=new_message
+            session_id=session_id,
+            user_id="self",
+            new_message=new_message,
+            run_config=self._run_config,
         )
 
     async def _process_request(
         self,
         new_message: types.Content,
-        session_id: str,
+        session: _RequestSession,
         task_updater: TaskUpdater,
     ) -> None:
-        session, _ = await self._upsert_session(session_id)
-        session_id = session.id
-
-        current_message = new_message
-
-        # The ADK agent can have multiple turns (e.g., tool call -> tool response -> final answer)
-        # We need to loop until the agent gives a final response.
-        while True:
-            # Get the stream of events from the agent for the current turn
-            event_stream = self._run_agent(session_id, current_message)
-
-            function_calls_to_execute = []
-
-            async for event in event_stream:
-                if event.is_final_response():
-                    # The agent is done, send the final result and terminate.
-                    parts = []
-                    if event.content and event.content.parts:
-                        parts = convert_genai_parts_to_a2a(event.content.parts)
-
-                    if event.content and event.content.parts:
-                        logger.info(
-                            _format_block(
-                                "점원 에이전트 메시지",
-                                _serialize_parts(event.content.parts),
-                            )
-                        )
-
-                    logger.debug("Yielding final response: %s", parts)
-                    if parts:
-                        await task_updater.add_artifact(parts)
-
-                    await task_updater.complete()
-                    return  # Exit the loop and the method
-
-                if event.get_function_calls():
-                    # The agent wants to call a tool. Collect all calls for this turn.
-                    function_calls_to_execute.extend(event.get_function_calls())
-                elif event.content and event.content.parts:
-                    # --- Custom Artifact Interception ---
-                    # Check if the content part is a function response containing our artifact
-                    logger.debug("Yielding update response: %s", event.content.parts)
-                    is_artifact_response = False
-                    for part in event.content.parts:
-                        if part.function_response:
-                            response_data = part.function_response.response
-                            if (
-                                isinstance(response_data, dict)
-                                and "artifact" in response_data
-                                and "artifactId" in response_data["artifact"]
-                                and "parts" in response_data["artifact"]
+        status = _StatusCoalescer(
+            task_updater, self._status_interval, self._status_max_events
+        )
+        try:
+            await self._run_turns(new_message, session, task_updater, status)
+        except LlmCallsLimitExceededError:
+            await status.flush()
+            await self._fail_over_budget(task_updater, session)
+        except (x402PaymentRequiredException, asyncio.CancelledError):
+            # Output produced before the payment request or the cancel still
+            # goes out ahead of that status
+            await status.flush()
+            raise
+        finally:
+            status.close()
+
+    async def _run_turns(
+        self,
+        new_message: types.Content,
+        session: _RequestSession,
+        task_updater: TaskUpdater,
+        status: _StatusCoalescer,
+    ) -> None:
+        """
+        Runs the agent until it gives a final response. The runner runs the
+        model and tool turns itself (tool call -> tool response -> final
+        answer), calling the tools of one model reply concurrently.
+        """
+        # The runner reads the session itself; persist saved state first
+        await session.flush()
+        session.mark_stale()
+
+        # A final-looking reply is only final if the stream ends with it:
+        # in SSE mode ADK also yields the aggregated text of a reply that
+        # goes on to call a tool ("주문을 생성할게요." then create_order).
+        final_event = None
+        # Whether partial chunks of the current reply went out as status
+        streamed = False
+
+        async for event in self._run_agent(session.id, new_message):
+            if final_event is not None:
+                # The stream went on, so that reply was a preamble
+                preamble = final_event.content and final_event.content.parts
+                if preamble and not streamed:
+                    await status.add(preamble)
+                final_event = None
+                streamed = False
+
+            if event.is_final_response():
+                final_event = event
+                continue
+
+            if event.partial:
+                streamed = True
+            elif event.content:
+                streamed = False
+
+            if event.get_function_calls():
+                # The runner calls the tools and yields their responses next
+                logger.debug("Agent requested tools: %s", event.get_function_calls())
+            elif event.content and event.content.parts:
+                # --- Custom Artifact Interception ---
+                # Check if the content part is a function response containing our artifact
+                logger.debug("Yielding update response: %s", event.content.parts)
+                is_artifact_response = False
+                for part in event.content.parts:
+                    if part.function_response:
+                        response_data = part.function_response.response
+                        if _is_artifact_response(response_data):
+                            logger.info("Intercepted artifact in function response.")
+                            await status.flush()
+                            if await self._emit_artifact(
+                                response_data, task_updater, session
                             ):
-                                logger.info(
-                                    "Intercepted artifact in function response."
-                                )
-                                logger.info(
-                                    _format_block(
-                                        "점원 에이전트 메시지",
-                                        response_data,
-                                    )
-                                )
-                                artifact_parts = [
-                                    Part(root=DataPart(**p))
-                                    for p in response_data["artifact"].get("parts", [])
-                                    if "data" in p
-                                ]
-                                if artifact_parts:
-                                    logger.debug("Adding artifact: %s", artifact_parts)
-                                    await task_updater.add_artifact(
-                                        parts=artifact_parts,
-                                        artifact_id=response_data["artifact"][
-                                            "artifactId"
-                                        ],
-                                        name=response_data["artifact"].get("name"),
-                                        metadata=response_data["artifact"].get(
-                                            "metadata"
-                                        ),
-                                        extensions=response_data["artifact"].get(
-                                            "extensions"
-                                        ),
-                                    )
-                                    await task_updater.complete()
-                                    return  # Task complete, exit.
-                                is_artifact_response = True
-                                break  # Found it, no need to check other parts.
-
-                    if not is_artifact_response:
-                        # This is a standard intermediate response from the agent.
-                        logger.debug(
-                            "Yielding update response: %s", event.content.parts
-                        )
-                        await task_updater.update_status(
-                            TaskState.working,
-                            message=task_updater.new_agent_message(
-                                convert_genai_parts_to_a2a(event.content.parts),
-                            ),
-                        )
-                else:
-                    logger.debug("Skipping empty event: %s", event)
-
-            if not function_calls_to_execute:
-                # The stream ended without a final response or a tool call.
-                # This indicates an unexpected state. We'll complete the task to avoid hanging.
-                logger.warning("ADK agent stream ended unexpectedly. Completing task.")
-                await task_updater.complete()
-                return
+                                return  # Task complete, exit.
+                            is_artifact_response = True
+                            break  # Found it, no need to check other parts.
+
+                if not is_artifact_response:
+                    # This is a standard intermediate response from the agent.
+                    await status.add(event.content.parts)
+            else:
+                logger.debug("Skipping empty event: %s", event)
+
+        # Publish the run's output before the task ends
+        await status.flush()
+
+        if final_event is None:
+            # The stream ended without a final response. This indicates an
+            # unexpected state. We'll complete the task to avoid hanging.
+            logger.warning("ADK agent stream ended unexpectedly. Completing task.")
+            await self._complete(task_updater, session)
+            return
+
+        # The agent is done, send the final result and terminate.
+        parts = []
+        if final_event.content and final_event.content.parts:
+            parts = convert_genai_parts_to_a2a(final_event.content.parts)
+            _log_block(
+                "점원 에이전트 메시지",
+                lambda content=final_event.content: _serialize_parts(content.parts),
+            )
 
-            # --- Execute Tools ---
-            tool_outputs = []
-            for call in function_calls_to_execute:
-                tool_name = call.name
-                tool_args = dict(call.args)
+        logger.debug("Yielding final response: %s", parts)
+        if parts:
+            await task_updater.add_artifact(parts)
+        await self._complete(task_updater, session)
 
-                logger.debug(
-                    f"Attempting to execute tool '{tool_name}' with args: {tool_args}"
-                )
+    async def _fail_over_budget(
+        self, task_updater: TaskUpdater, session: _RequestSession
+    ) -> None:
+        """Fails a task that used up its turn budget."""
+        logger.warning(f"Agent did not finish within {self._max_turns} turns. Failing task.")
+        await session.flush()
+        await task_updater.failed(
+            message=task_updater.new_agent_message(
+                [Part(root=TextPart(text="요청을 처리하지 못했습니다. 다시 시도해 주세요."))]
+            )
+        )
 
-                # Find the corresponding tool function registered with the agent
-                target_tool = next(
-                    (
-                        t
-                        for t in self.runner.agent.tools
-                        if getattr(t, "__name__", None) == tool_name
-                    ),
-                    None,
-                )
+    def _find_tool(self, tool_name: str) -> _ToolEntry:
+        """Returns the dispatch entry of the tool registered under tool_name."""
+        target_tool = self._tools.get(tool_name)
+        if not target_tool:
+            raise ValueError(
+                f"Tool '{tool_name}' requested by the LLM but not found on the agent."
+            )
+        return target_tool
 
-                if not target_tool:
-                    raise ValueError(
-                        f"Tool '{tool_name}' requested by the LLM but not found on the agent."
-                    )
+    async def _call_tool(
+        self, target_tool: _ToolEntry, tool_args: dict[str, Any], session: _RequestSession
+    ) -> Any:
+        """
+        Runs a tool and saves any context it returns to the session. Sync
+        tools run in a worker thread to keep the event loop free. Returns the
+        result to report back to the agent.
+        """
+        if target_tool.is_async:
+            tool_result = await target_tool.func(**tool_args)
+        else:
+            tool_result = await asyncio.to_thread(target_tool.func, **tool_args)
+
+        # --- Context Saving ---
+        # Check if the tool returned context to be saved for future turns.
+        # A tool that finishes an order cycle lets its history be compacted
+        compaction.pop_cycle_summary(tool_result)
+
+        if isinstance(tool_result, dict) and "context_to_save" in tool_result:
+            context_to_save = tool_result.get("context_to_save")
+            if context_to_save:
+                logger.info("Saving context to session: %s", context_to_save)
+                # Persisted with the request's other changes on the next flush
+                await session.update(context_to_save)
+            # The actual result for the LLM is the 'artifact' part.
+            tool_result = tool_result.get(
+                "artifact",
+                {"status": "Context saved, no artifact returned."},
+            )
+        return tool_result
 
-                try:
-                    # Execute the tool. This can raise x402PaymentRequiredException or return an artifact.
-                    # Support both async and sync tools.
-                    if inspect.iscoroutinefunction(target_tool):
-                        tool_result = await target_tool(**tool_args)
-                    else:
-                        tool_result = target_tool(**tool_args)
-
-                    # --- Context Saving ---
-                    # Check if the tool returned context to be saved for future turns.
-                    if (
-                        isinstance(tool_result, dict)
-                        and "context_to_save" in tool_result
-                    ):
-                        context_to_save = tool_result.get("context_to_save")
-                        if context_to_save:
-                            logger.info(f"Saving context to session: {context_to_save}")
-                            session.state.update(context_to_save)
-                            await self.runner.session_service.update_session(session)
-                        # The actual result for the LLM is the 'artifact' part.
-                        tool_result = tool_result.get(
-                            "artifact",
-                            {"status": "Context saved, no artifact returned."},
-                        )
-
-                    # The tool result is always wrapped in a FunctionResponse and sent back to the agent.
-                    # The event loop will inspect this response to see if it's a final artifact.
-                    tool_outputs.append(
-                        types.Part(
-                            function_response=types.FunctionResponse(
-                                name=tool_name, response=tool_result
-                            )
-                        )
-                    )
-                except x402PaymentRequiredException:
-                    # This special exception must propagate up to the x402ServerExecutor.
-                    raise
-                except Exception as e:
-                    # Any other tool error should be reported back to the LLM.
-                    logger.error(
-                        f"Tool '{tool_name}' execution failed: {e}", exc_info=True
-                    )
-                    tool_outputs.append(
-                        types.Part(
-                            function_response=types.FunctionResponse(
-                                name=tool_name, response={"error": str(e)}
-                            )
-                        )
-                    )
+    async def _complete(self, task_updater: TaskUpdater, session: _RequestSession) -> None:
+        """
+        Persists the request's session changes, then completes the task, so a
+        client acting on completion always finds the saved state.
+        """
+        await session.flush()
+        await task_updater.complete()
 
-            # Prepare the next message to send to the agent, containing the tool results.
-            current_message = types.Content(parts=tool_outputs, role="tool")
+    async def _emit_artifact(
+        self,
+        response_data: dict[str, Any],
+        task_updater: TaskUpdater,
+        session: _RequestSession,
+    ) -> bool:
+        """
+        Publishes a tool's artifact and completes the task. Returns False if
+        the artifact had no data parts.
+        """
+        _log_block("점원 에이전트 메시지", response_data)
+        artifact = response_data["artifact"]
+        artifact_parts = [
+            Part(root=DataPart(**p)) for p in artifact.get("parts", []) if "data" in p
+        ]
+        if not artifact_parts:
+            return False
+        logger.debug("Adding artifact: %s", artifact_parts)
+        await task_updater.add_artifact(
+            parts=artifact_parts,
+            artifact_id=artifact["artifactId"],
+            name=artifact.get("name"),
+            metadata=artifact.get("metadata"),
+            extensions=artifact.get("extensions"),
+        )
+        await self._complete(task_updater, session)
+        return True
+
+    async def _run_mandate_fast_path(
+        self, parts: list[Part], session: _RequestSession, task_updater: TaskUpdater
+    ) -> bool:
+        """
+        Runs a structured mandate straight through the tool the agent's
+        mandate router picks, skipping the LLM round trip that would only
+        choose that tool. Returns False if the message is not handled here.
+        """
+        if self._fast_path == "off" or self._mandate_router is None:
+            return False
+
+        route = None
+        for data in _structured_data(parts):
+            route = self._mandate_router(data, (await session.get()).state)
+            if route is not None:
+                break
+        if route is None:
+            return False
+
+        tool_name, tool_args = route
+        logger.info("Mandate fast path: calling '%s' without the LLM.", tool_name)
+        try:
+            tool_result = await self._call_tool(
+                self._find_tool(tool_name), tool_args, session
+            )
+        except x402PaymentRequiredException:
+            # This special exception must propagate up to the x402ServerExecutor.
+            raise
+        except Exception as e:
+            logger.exception(f"Tool '{tool_name}' execution failed")
+            tool_result = {"error": str(e)}
+
+        # Tools that save context return the artifact itself; publish it
+        # directly, as there is no LLM turn to intercept it from.
+        if isinstance(tool_result, dict) and "artifactId" in tool_result:
+            tool_result = {"artifact": tool_result}
+        if _is_artifact_response(tool_result) and await self._emit_artifact(
+            tool_result, task_updater, session
+        ):
+            return True
+
+        if self._fast_path == "direct":
+            if isinstance(tool_result, dict):
+                text = tool_result.get("message") or tool_result.get("error")
+            else:
+                text = None
+            await task_updater.add_artifact(
+                [Part(root=TextPart(text=text or codec.dumps_str(tool_result)))]
+            )
+            await self._complete(task_updater, session)
+            return True
+
+        # Let the LLM turn the tool result into the closing message
+        closing_request = types.UserContent(
+            parts=[
+                types.Part(
+                    text=(
+                        f"`{tool_name}` 도구를 이미 실행했습니다. 결과: "
+                        f"{codec.dumps_str(tool_result)}\n"
+                        "도구를 다시 호출하지 말고 이 결과를 고객에게 안내하세요."
+                    )
+                )
+            ]
+        )
+        await self._process_request(closing_request, session, task_updater)
+        return True
 
     async def _preprocess_and_find_payment_payload(
         self, context: RequestContext
@@ -321,7 +720,7 @@ class ADKAgentExecutor(AgentExecutor):
                     if isinstance(data, dict) and "x402_payment_object" in data:
                         # Return the base64 encoded payload string
                         return data["x402_payment_object"]
-                except (json.JSONDecodeError, TypeError):
+                except (codec.JSONDecodeError, TypeError):
                     # Not a valid JSON string or not a dict, so we ignore it
                     continue
         return None
@@ -330,40 +729,98 @@ class ADKAgentExecutor(AgentExecutor):
         self,
         context: RequestContext,
         event_queue: EventQueue,
+    ):
+        # Register the running request so cancel() can interrupt it. Cancelling
+        # this task closes the model stream, cancels the turn's tool coroutines
+        # and aborts their outbound HTTP calls (wallet, facilitator).
+        run = asyncio.current_task()
+        assert run is not None, "execute() runs inside a task"
+        runs = self._running_sessions.setdefault(context.context_id, {})
+        runs[context.task_id] = run
+        session = _RequestSession(self.runner, context.context_id)
+        timer = None
+        try:
+            # Model turns, tool calls and the wallet and facilitator requests
+            # they make all inherit the deadline, and report the order cycles
+            # they finish to this request's session
+            timeout = deadline.request_timeout(
+                context.metadata,
+                context.message.metadata if context.message else None,
+                default=self._task_timeout,
+            )
+            with deadline.scope(timeout), compaction.collect_cycles(session.close_cycle):
+                async with asyncio.timeout(deadline.remaining()) as timer:
+                    await self._execute(context, event_queue, session)
+        except TimeoutError:
+            if timer is None or not timer.expired():
+                raise
+            logger.warning(f"[{self._card.name}] task {context.task_id} hit its deadline")
+            task_updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+            await task_updater.failed(
+                message=task_updater.new_agent_message(
+                    [Part(root=TextPart(text="요청 처리 시간이 초과되었습니다. 다시 시도해 주세요."))]
+                )
+            )
+        except asyncio.CancelledError:
+            logger.info(f"[{self._card.name}] task {context.task_id} cancelled")
+            # The request handler does not close this queue when the run is
+            # cancelled; the final status ends the client's stream.
+            await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
+            raise
+        finally:
+            # Keeps state saved before a payment request, error or cancel
+            await session.flush()
+            await session.compact_cycles()
+            if runs.get(context.task_id) is run:
+                del runs[context.task_id]
+            if not runs and self._running_sessions.get(context.context_id) is runs:
+                del self._running_sessions[context.context_id]
+
+    async def _execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+        session: _RequestSession,
     ):
         task_updater = TaskUpdater(event_queue, context.task_id, context.context_id)
-        session, session_created = await self._upsert_session(context.context_id)
+        # First event out: streaming clients see the task start right away
+        await task_updater.start_work()
+        adk_session = await session.get()
+        # Keep the history the model sees within budget before it runs
+        await session.enforce_budget(self._compaction)
 
         # 유저 에이전트 메시지 로깅 (수신 원문 기준)
-        logger.info(
-            _format_block(
-                "유저 에이전트 메시지",
-                {
-                    "parts": _serialize_parts(context.message.parts),
-                    "context_id": context.context_id,
-                },
-            )
+        _log_block(
+            "유저 에이전트 메시지",
+            lambda: {
+                "parts": _serialize_parts(context.message.parts),
+                "context_id": context.context_id,
+            },
         )
 
         # Task 정보 로깅 (신규/재사용 구분)
-        task_info = {
-            "task_id": context.task_id,
-            "is_new_task": context.current_task is None,
-        }
-        if context.current_task:
-            task_info["status"] = _to_serializable(context.current_task.status)
-            task_info["metadata"] = getattr(context.current_task, "metadata", {})
+        def task_info():
+            info = {
+                "task_id": context.task_id,
+                "is_new_task": context.current_task is None,
+            }
+            if context.current_task:
+                info["status"] = _to_serializable(context.current_task.status)
+                info["metadata"] = getattr(context.current_task, "metadata", {})
+            return info
 
-        logger.info(_format_block("Task 정보", task_info))
+        _log_block("Task 정보", task_info)
 
         # Session 정보 로깅 (신규/재사용 모두)
-        session_info = {
-            "session_id": session.id,
-            "is_new_session": session_created,
-            "state": getattr(session, "state", {}),
-            "user_id": getattr(session, "user_id", None),
-        }
-        logger.info(_format_block("Session 정보", session_info))
+        _log_block(
+            "Session 정보",
+            lambda: {
+                "session_id": adk_session.id,
+                "is_new_session": session.created,
+                "state": getattr(adk_session, "state", {}),
+                "user_id": getattr(adk_session, "user_id", None),
+            },
+        )
 
         # Check if the x402 wrapper has verified a payment by looking at the task metadata.
         if context.current_task and context.current_task.metadata.get(
@@ -379,20 +836,28 @@ class ADKAgentExecutor(AgentExecutor):
                 .get("extra", {})
                 .get("name", "the item")
             )
-            session.state["payment_verified_data"] = {
-                "product": product_name,
-                "status": "SUCCESS",
-            }
+            await session.update(
+                {
+                    "payment_verified_data": {
+                        "product": product_name,
+                        "status": "SUCCESS",
+                    }
+                }
+            )
+            session.close_cycle(f"{product_name} 결제 완료")
             # We still need to send a message to trigger the agent's turn.
             # The content doesn't matter as much, as the callback will intercept it.
             user_message = types.UserContent(
                 parts=[types.Part(text="Payment verified. Please proceed.")]
             )
-            # We must re-fetch the session here to ensure the state changes
-            # from the x402 executor are reflected before the agent's
-            # `before_agent_callback` is invoked.
-            session, _ = await self._upsert_session(session.id)
         else:
+            # Signed mandates can skip the LLM's tool selection entirely
+            if await self._run_mandate_fast_path(
+                context.message.parts, session, task_updater
+            ):
+                logger.debug("[%s] execute exiting", self._card.name)
+                return
+
             # No payment verification; process the original user message.
             user_message = types.UserContent(
                 parts=convert_a2a_parts_to_genai(context.message.parts)
@@ -400,28 +865,31 @@ class ADKAgentExecutor(AgentExecutor):
 
         await self._process_request(
             user_message,
-            session.id,
+            session,
             task_updater,
         )
 
-        logger.debug(f"[{self._card.name}] execute exiting")
+        logger.debug("[%s] execute exiting", self._card.name)
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        # Ideally: kill any ongoing tasks.
-        raise ServerError(error=UnsupportedOperationError())
-
-    async def _upsert_session(self, session_id: str):
-        session = await self.runner.session_service.get_session(
-            app_name=self.runner.app_name, user_id="self", session_id=session_id
-        )
-        if session:
-            return session, False
-        return (
-            await self.runner.session_service.create_session(
-                app_name=self.runner.app_name, user_id="self", session_id=session_id
-            ),
-            True,
-        )
+        """
+        Stops the task's in-flight run and marks the task canceled. A
+        cancelled run publishes the canceled status itself, which reaches
+        both its own stream and event_queue (a tap of the same queue).
+        """
+        run = self._running_sessions.get(context.context_id, {}).get(context.task_id)
+        if run is not None and not run.done():
+            run.cancel()
+            # Wait for the run to release its stream, tools and connections
+            _, pending = await asyncio.wait({run}, timeout=CANCEL_GRACE_SECONDS)
+            if not pending:
+                return
+            logger.warning(
+                f"[{self._card.name}] task {context.task_id} still running "
+                f"{CANCEL_GRACE_SECONDS}s after cancel"
+            )
+        # Nothing running (e.g. waiting for input) or the run did not unwind
+        await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
 
 
 def convert_a2a_parts_to_genai(parts: list[Part]) -> list[types.Part]:
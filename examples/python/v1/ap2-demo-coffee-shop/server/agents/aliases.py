@@ -0,0 +1,89 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Alias and fuzzy-match index for drink, size and bean names."""
+
+import re
+import unicodedata
+from collections import defaultdict
+from collections.abc import Iterable
+
+# Minimum Dice similarity for a fuzzy match to be accepted
+FUZZY_THRESHOLD = 0.6
+
+_SEPARATORS = re.compile(r"[\s\-_.,·]+")
+
+
+def normalize_name(name: str) -> str:
+    """Case-folds and strips separators, so "Caramel-Macchiato" == "caramelmacchiato"."""
+    return _SEPARATORS.sub("", unicodedata.normalize("NFC", name).casefold())
+
+
+def _bigrams(normalized: str) -> set[str]:
+    padded = f"^{normalized}$"
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+class NameIndex:
+    """
+    Resolves user-supplied names to canonical catalog keys.
+
+    Exact aliases (Korean names, English names, common spellings) resolve
+    through one dict lookup on the normalized name. Anything else falls
+    back to a character-bigram inverted index scored by Dice similarity,
+    which absorbs typos such as "cappucino" or "카라멜마키아또".
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, Iterable[str]]]):
+        """
+        Args:
+            entries: (canonical name, aliases) pairs
+        """
+        self._exact: dict[str, str] = {}
+        self._postings: dict[str, set[str]] = defaultdict(set)
+        self._grams: dict[str, set[str]] = {}
+        for canonical, aliases in entries:
+            for alias in (canonical, *aliases):
+                key = normalize_name(alias)
+                self._exact.setdefault(key, canonical)
+                grams = _bigrams(key)
+                self._grams[key] = grams
+                for gram in grams:
+                    self._postings[gram].add(key)
+
+    def resolve(self, name: str) -> str | None:
+        """Returns the canonical name, or None if nothing matches well enough."""
+        key = normalize_name(name)
+        canonical = self._exact.get(key)
+        if canonical is not None:
+            return canonical
+
+        query = _bigrams(key)
+        overlap: dict[str, int] = defaultdict(int)
+        for gram in query:
+            for candidate in self._postings.get(gram, ()):
+                overlap[candidate] += 1
+
+        best_score = 0.0
+        best: set[str] = set()
+        for candidate, common in overlap.items():
+            score = 2 * common / (len(query) + len(self._grams[candidate]))
+            if score > best_score:
+                best_score, best = score, {self._exact[candidate]}
+            elif score == best_score:
+                best.add(self._exact[candidate])
+
+        # Reject weak or ambiguous matches rather than guessing
+        if best_score < FUZZY_THRESHOLD or len(best) != 1:
+            return None
+        return best.pop()
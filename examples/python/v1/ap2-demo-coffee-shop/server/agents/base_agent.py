@@ -14,6 +14,7 @@
 """Base agent interface for the coffee shop demo."""
 
 from abc import ABC, abstractmethod
+from typing import Any
 
 from a2a.types import AgentCard
 
@@ -31,3 +32,13 @@ class BaseAgent(ABC):
         """Create and return the AgentCard for this agent."""
         raise NotImplementedError("Subclasses must implement this method")
 
+    def route_mandate(
+        self, data: dict[str, Any], state: dict[str, Any]
+    ) -> tuple[str, dict[str, Any]] | None:
+        """
+        Maps structured data received from a client (such as a signed mandate)
+        to a (tool name, arguments) call the executor can run without the LLM.
+        Returns None to let the LLM handle the message.
+        """
+        return None
+
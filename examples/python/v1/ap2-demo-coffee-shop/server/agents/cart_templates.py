@@ -0,0 +1,232 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Prevalidated CartMandate templates, one per cart composition.
+
+A cart is a tuple of line items, each a (drink, size, bean) combination
+with a quantity. For a given composition, everything in a cart except the
+order id, cart id and expiry is fixed by the catalog and the merchant
+address. The template holds those parts as validated pydantic models, and
+each order stamps in its own fields with model_copy, which skips
+validation.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from ap2.types.mandate import CartContents
+from ap2.types.payment_request import PaymentRequest
+from x402_a2a.types import PaymentRequirements
+
+from .menu import CompiledCatalog, format_amount_usd, get_order_description
+
+MERCHANT_NAME = "☕ AI Coffee Shop"
+
+# Carts with more distinct compositions than this evict the least recently used
+MAX_TEMPLATES = 1024
+
+# Placeholders for the per-order fields while the template is validated
+_TEMPLATE_ID = "template"
+_TEMPLATE_EXPIRY = "1970-01-01T00:00:00+00:00"
+
+# ((drink, size, bean), quantity) per line, in display order
+CartLines = tuple[tuple[tuple[str, str, str], int], ...]
+
+
+@dataclass(frozen=True)
+class CartTemplate:
+    """Validated cart parts for one cart composition."""
+
+    order_description: str
+    price_usd: str
+    requirements: PaymentRequirements
+    # requirements.model_dump(), shared between orders and treated as read-only
+    requirements_dump: dict[str, Any]
+    cart_contents: CartContents
+
+    def stamp(self, order_id: str, cart_id: str, cart_expiry: datetime) -> CartContents:
+        """Returns the cart contents for one order."""
+        payment_request = self.cart_contents.payment_request
+        details = payment_request.details.model_copy(update={"id": order_id})
+        return self.cart_contents.model_copy(
+            update={
+                "id": cart_id,
+                "payment_request": payment_request.model_copy(update={"details": details}),
+                "cart_expiry": cart_expiry.isoformat(),
+            }
+        )
+
+
+def build_cart_template(catalog: CompiledCatalog, pay_to: str, lines: CartLines) -> CartTemplate:
+    """
+    Builds and validates the cart template for lines that passed
+    catalog.validate. The cart is paid with one authorization for the sum
+    of all lines.
+    """
+    display_items = []
+    line_details = []
+    descriptions = []
+    total_price = 0
+    for (drink, size, bean), quantity in lines:
+        unit_price = catalog.quote(drink, size, bean)
+        line_price = unit_price * quantity
+        total_price += line_price
+        description = get_order_description(drink, size, bean)
+        if quantity > 1:
+            description = f"{description} x{quantity}"
+        descriptions.append(description)
+        display_items.append(
+            {
+                "label": description,
+                "amount": {
+                    "currency": "USD",
+                    "value": format_amount_usd(line_price),
+                },
+            }
+        )
+        line_details.append(
+            {
+                "drink": drink,
+                "size": size,
+                "bean": bean,
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "drink_description": catalog.menu[drink]["description"],
+                "size_volume": catalog.sizes[size]["volume"],
+                "bean_description": catalog.beans[bean]["description"],
+            }
+        )
+
+    # Lines and total use the exact atomic amounts, so they add up to each
+    # other and to maxAmountRequired
+    price_usd = f"${format_amount_usd(total_price)}"
+    order_description = ", ".join(descriptions)
+    if len(lines) == 1 and lines[0][1] == 1:
+        # Single drink: keep the flat fields and per-drink resource
+        (drink, size, bean), _ = lines[0]
+        resource = f"/order/{drink}/{size}/{bean}"
+        order_details = {
+            key: value
+            for key, value in line_details[0].items()
+            if key not in ("quantity", "unit_price")
+        }
+    else:
+        resource = "/order/cart"
+        order_details = {"items": line_details}
+    order_details["catalog_version"] = catalog.version
+
+    requirements = PaymentRequirements(
+        scheme="exact",
+        network="base-sepolia",
+        asset="0x036CbD53842c5426634e7929541eC2318f3dCF7e",  # USDC on Base Sepolia
+        pay_to=pay_to,
+        max_amount_required=str(total_price),
+        description=f"☕ {order_description} 주문",
+        resource=resource,
+        mime_type="application/json",
+        max_timeout_seconds=1200,
+        extra={
+            "name": order_description,
+            "description": f"Your order: {order_description}",
+            "order_details": order_details,
+        },
+    )
+
+    # x402 Payment Required structure
+    x402_payment_required = {
+        "x402.payment.required": {
+            "x402Version": 1,
+            "accepts": [
+                {
+                    "scheme": requirements.scheme,
+                    "network": requirements.network,
+                    "asset": requirements.asset,
+                    "payTo": requirements.pay_to,
+                    "maxAmountRequired": requirements.max_amount_required,
+                }
+            ],
+        }
+    }
+
+    payment_request = PaymentRequest(
+        method_data=[
+            {
+                "supported_methods": "https://www.x402.org/",
+                "data": x402_payment_required,
+            }
+        ],
+        details={
+            "id": _TEMPLATE_ID,
+            "display_items": display_items,
+            "total": {
+                "label": "Total",
+                "amount": {"currency": "USD", "value": format_amount_usd(total_price)},
+            },
+        },
+    )
+
+    cart_contents = CartContents(
+        id=_TEMPLATE_ID,
+        user_cart_confirmation_required=True,
+        payment_request=payment_request,
+        cart_expiry=_TEMPLATE_EXPIRY,
+        merchant_name=MERCHANT_NAME,
+    )
+
+    return CartTemplate(
+        order_description=order_description,
+        price_usd=price_usd,
+        requirements=requirements,
+        requirements_dump=requirements.model_dump(),
+        cart_contents=cart_contents,
+    )
+
+
+class CartTemplateCache:
+    """
+    Cart templates keyed by composition for the current catalog version.
+
+    The first lookup with a newer catalog version drops every cached
+    template, so prices and descriptions never go stale. Lookups with an
+    older snapshot (an order that started before a reload) get an uncached
+    template and leave the cache alone.
+    """
+
+    def __init__(self, pay_to: str, max_size: int = MAX_TEMPLATES):
+        self._pay_to = pay_to
+        self._max_size = max_size
+        self._version: int | None = None
+        self._templates: OrderedDict[CartLines, CartTemplate] = OrderedDict()
+
+    def get(self, catalog: CompiledCatalog, lines: CartLines) -> CartTemplate:
+        """Returns the template for lines that passed catalog.validate."""
+        if self._version is None or catalog.version > self._version:
+            self._templates = OrderedDict()
+            self._version = catalog.version
+        elif catalog.version < self._version:
+            return build_cart_template(catalog, self._pay_to, lines)
+        template = self._templates.get(lines)
+        if template is not None:
+            self._templates.move_to_end(lines)
+            return template
+        template = build_cart_template(catalog, self._pay_to, lines)
+        self._templates[lines] = template
+        if len(self._templates) > self._max_size:
+            self._templates.popitem(last=False)
+        return template
+
+    def __len__(self) -> int:
+        return len(self._templates)
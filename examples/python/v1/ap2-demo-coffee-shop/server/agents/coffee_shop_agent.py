@@ -17,13 +17,13 @@ import logging
 import os
 import uuid
 import json
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
 from typing import Any, override
 
 import httpx
 from a2a.types import AgentCard, AgentCapabilities, AgentSkill
-from ap2.types.mandate import CART_MANDATE_DATA_KEY, CartContents, CartMandate
-from ap2.types.payment_request import PaymentRequest
+from ap2.types.mandate import CART_MANDATE_DATA_KEY
 from dotenv import load_dotenv
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
@@ -37,24 +37,39 @@ from x402_a2a.types import (
     PaymentRequirements,
 )
 
+from common import deadline
+from common.canonical import CanonicalPayload
+from common.coalescer import SignatureCoalescer
+from common.merkle import CHAIN_IDS, MerkleBatchAuthorizer
+from common.signer import HttpSigner, Signer, create_signer
+
+from . import compaction
+from ._adk_agent_executor import offload_sync_tools
 from .base_agent import BaseAgent
+from .cart_templates import CartTemplateCache
 from .menu import (
-    BEANS,
     DEFAULT_BEAN,
     DEFAULT_SIZE,
-    MENU,
-    SIZES,
-    calculate_price,
-    format_price_usd,
+    get_catalog,
     get_menu_display,
-    get_order_description,
-    validate_order,
+    items_from_skus,
 )
+from .x402_executor import FACILITATOR_TIMEOUT_SECONDS
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Upper bound on drinks in one cart
+MAX_CART_QUANTITY = 100
+
+# Payment requirements create_order saved in the session, loaded for the
+# current request. Requests share one agent instance and run concurrently,
+# so this is scoped to the request's task context rather than the instance.
+_payment_requirements: ContextVar[PaymentRequirements | None] = ContextVar(
+    "payment_requirements", default=None
+)
+
 
 class CoffeeShopAgent(BaseAgent):
     """
@@ -71,7 +86,33 @@ class CoffeeShopAgent(BaseAgent):
         if not self._wallet_address:
             raise ValueError("MERCHANT_WALLET_ADDRESS environment variable not set.")
         self._facilitator = FacilitatorClient()
-        self._current_payment_requirements: PaymentRequirements | None = None
+        self._signer = self._create_signer()
+        self._cart_templates = CartTemplateCache(self._wallet_address)
+        # Optional: authorize carts with one signature per Merkle batch
+        self._cart_authorizer: MerkleBatchAuthorizer | None = None
+        if os.getenv("MERCHANT_AUTH_MODE", "signature") == "merkle":
+            self._cart_authorizer = MerkleBatchAuthorizer(
+                self._signer,
+                merchant_address=self._wallet_address,
+                chain_id=CHAIN_IDS["base-sepolia"],
+                window_seconds=float(os.getenv("MERCHANT_AUTH_BATCH_WINDOW_MS", "50")) / 1000,
+                max_batch_size=int(os.getenv("MERCHANT_AUTH_BATCH_MAX_SIZE", "256")),
+            )
+
+    @staticmethod
+    def _create_signer() -> Signer:
+        """
+        Creates the merchant signer from LOCAL_WALLET_URL. Remote wallets are
+        wrapped in a coalescer so concurrent orders share one batch call.
+        """
+        signer = create_signer()
+        if isinstance(signer, HttpSigner):
+            return SignatureCoalescer(
+                signer,
+                window_seconds=float(os.getenv("WALLET_BATCH_WINDOW_MS", "5")) / 1000,
+                max_batch_size=int(os.getenv("WALLET_BATCH_MAX_SIZE", "64")),
+            )
+        return signer
 
     def get_menu(self) -> dict[str, Any]:
         """
@@ -86,131 +127,95 @@ class CoffeeShopAgent(BaseAgent):
 
     async def create_order(
         self,
-        drink: str,
+        drink: str = "",
         size: str = DEFAULT_SIZE,
         bean: str = DEFAULT_BEAN,
+        quantity: int = 1,
+        items: list[dict[str, Any]] | None = None,
     ) -> dict[str, Any]:
         """
-        Creates an order for a drink with the specified options.
-        Returns a CartMandate with x402 payment requirements.
-        
+        Creates an order for one or more drinks with the specified options.
+        Returns a single CartMandate with x402 payment requirements covering
+        every line, so the whole cart is paid and settled once.
+
         Args:
             drink: Name of the drink (e.g., "아메리카노", "카페라떼")
             size: Size option (Short/Tall/Grande/Venti), defaults to Tall
             bean: Bean option (일반/디카페인/하프디카페인), defaults to 일반
+            quantity: Number of this drink, defaults to 1
+            items: Line items for a multi-drink order, each with "drink" and
+                optional "size", "bean" and "quantity". Overrides drink, size,
+                bean and quantity when given.
         """
-        # Validate the order
-        is_valid, error_msg = validate_order(drink, size, bean)
-        if not is_valid:
-            return {"error": error_msg}
-
-        # Calculate price
-        total_price = calculate_price(drink, size, bean)
-        price_usd = format_price_usd(total_price)
-        order_description = get_order_description(drink, size, bean)
-
-        # Create PaymentRequirements
-        requirements = PaymentRequirements(
-            scheme="exact",
-            network="base-sepolia",
-            asset="0x036CbD53842c5426634e7929541eC2318f3dCF7e",  # USDC on Base Sepolia
-            pay_to=self._wallet_address,
-            max_amount_required=str(total_price),
-            description=f"☕ {order_description} 주문",
-            resource=f"/order/{drink}/{size}/{bean}",
-            mime_type="application/json",
-            max_timeout_seconds=1200,
-            extra={
-                "name": order_description,
-                "description": f"Your order: {order_description}",
-                "order_details": {
-                    "drink": drink,
-                    "size": size,
-                    "bean": bean,
-                    "drink_description": MENU[drink]["description"],
-                    "size_volume": SIZES[size]["volume"],
-                    "bean_description": BEANS[bean]["description"],
-                },
-            },
-        )
-
-        # Create x402 Payment Required structure
-        x402_payment_required = {
-            "x402.payment.required": {
-                "x402Version": 1,
-                "accepts": [
-                    {
-                        "scheme": requirements.scheme,
-                        "network": requirements.network,
-                        "asset": requirements.asset,
-                        "payTo": requirements.pay_to,
-                        "maxAmountRequired": requirements.max_amount_required,
-                    }
-                ],
-            }
-        }
+        # Price the whole order against one catalog snapshot, so a reload
+        # mid-order cannot change the version it was priced with.
+        catalog = get_catalog()
+
+        if not items:
+            items = [{"drink": drink, "size": size, "bean": bean, "quantity": quantity}]
+
+        # Merge repeated configurations so equal carts share a template
+        quantities: dict[tuple[str, str, str], int] = {}
+        for item in items:
+            # Map names like "caramel macchiato", "라떼" or "grande" to catalog
+            # keys so the model does not need another turn to retry.
+            config = catalog.normalize(
+                str(item.get("drink", "")),
+                str(item.get("size") or DEFAULT_SIZE),
+                str(item.get("bean") or DEFAULT_BEAN),
+            )
 
-        # Create AP2 PaymentRequest
-        order_id = f"order_{drink.lower()}_{uuid.uuid4()}"
-        payment_request = PaymentRequest(
-            method_data=[
-                {
-                    "supported_methods": "https://www.x402.org/",
-                    "data": x402_payment_required,
-                }
-            ],
-            details={
-                "id": order_id,
-                "display_items": [
-                    {
-                        "label": order_description,
-                        "amount": {"currency": "USD", "value": price_usd.replace("$", "")},
-                    }
-                ],
-                "total": {
-                    "label": "Total",
-                    "amount": {"currency": "USD", "value": price_usd.replace("$", "")},
-                },
-            },
+            # Validate the order
+            is_valid, error_msg = catalog.validate(*config)
+            if not is_valid:
+                return {"error": error_msg}
+            try:
+                item_quantity = int(item.get("quantity") or 1)
+            except (TypeError, ValueError):
+                return {"error": f"'{item.get('quantity')}'은(는) 올바른 수량이 아닙니다."}
+            if item_quantity < 1:
+                return {"error": "수량은 1 이상이어야 합니다."}
+            quantities[config] = quantities.get(config, 0) + item_quantity
+
+        if sum(quantities.values()) > MAX_CART_QUANTITY:
+            return {"error": f"한 번에 최대 {MAX_CART_QUANTITY}잔까지 주문할 수 있습니다."}
+
+        # Everything but the ids and expiry comes from a prevalidated template
+        lines = tuple(quantities.items())
+        template = self._cart_templates.get(catalog, lines)
+        order_description = template.order_description
+        price_usd = template.price_usd
+        order_name = lines[0][0][0].lower() if len(lines) == 1 else "cart"
+        cart_contents = template.stamp(
+            order_id=f"order_{order_name}_{uuid.uuid4()}",
+            cart_id=f"cart_{uuid.uuid4()}",
+            cart_expiry=datetime.now(timezone.utc) + timedelta(minutes=15),
         )
 
-        # Create CartContents
-        cart_contents = CartContents(
-            id=f"cart_{uuid.uuid4()}",
-            user_cart_confirmation_required=True,
-            payment_request=payment_request,
-            cart_expiry=(
-                datetime.now(timezone.utc) + timedelta(minutes=15)
-            ).isoformat(),
-            merchant_name="☕ AI Coffee Shop",
-        )
+        # Serialize the cart once. The same canonical bytes are signed and
+        # shipped, so a verifier re-deriving them from the artifact matches.
+        contents = CanonicalPayload.from_model(cart_contents)
 
-        # Sign the cart contents
+        # Sign the cart contents. With an HTTP wallet, concurrent orders are
+        # coalesced into one /sign/batch call. In Merkle mode, the carts of a
+        # batch share one root signature plus per-cart inclusion proofs.
         try:
-            payload_to_sign = cart_contents.model_dump_json()
-            wallet_url = os.getenv("LOCAL_WALLET_URL", "http://localhost:5001")
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{wallet_url}/sign",
-                    json={"payload": payload_to_sign},
-                )
-                response.raise_for_status()
-                signature_data = response.json()
+            if self._cart_authorizer is not None:
+                merchant_signature = await self._cart_authorizer.authorize(contents.text)
+            else:
+                signature_data = await self._signer.sign(contents.sign_request())
                 merchant_signature = signature_data.get("signature")
         except httpx.RequestError as e:
             return {"error": f"Failed to contact signing service: {e}"}
         except Exception as e:
             return {"error": f"An unexpected error occurred during signing: {e}"}
 
-        # Create CartMandate
-        cart_mandate = CartMandate(
-            contents=cart_contents,
-            merchant_authorization=merchant_signature,
-        )
-
-        # Return artifact and context to save
+        # CartMandate, built from the already-serialized contents
         cart_mandate_data = {
-            CART_MANDATE_DATA_KEY: cart_mandate.model_dump(by_alias=True)
+            CART_MANDATE_DATA_KEY: {
+                "contents": contents.data,
+                "merchant_authorization": merchant_signature,
+            }
         }
 
         logger.info(f"Created order: {order_description} for {price_usd}")
@@ -230,7 +235,7 @@ class CoffeeShopAgent(BaseAgent):
                     "https://github.com/google-agentic-commerce/a2a-x402/blob/main/spec/v0.2",
                 ],
             },
-            "context_to_save": {"payment_requirements": requirements.model_dump()},
+            "context_to_save": {"payment_requirements": template.requirements_dump},
         }
 
     async def process_payment(self, payment_mandate: dict[str, Any]) -> dict[str, Any]:
@@ -289,7 +294,7 @@ class CoffeeShopAgent(BaseAgent):
 
             # Reconstruct PaymentRequirements from the payment payload if not loaded from session
             # This handles the case where the payment comes in a different session/context
-            payment_requirements = self._current_payment_requirements
+            payment_requirements = _payment_requirements.get()
             if payment_requirements is None:
                 logger.info("Reconstructing payment requirements from payment payload...")
                 payment_requirements = PaymentRequirements(
@@ -307,10 +312,11 @@ class CoffeeShopAgent(BaseAgent):
             
             # Verify Payment
             logger.info("Verifying payment with Facilitator...")
-            verify_response = await self._facilitator.verify(
-                payment=payment_payload,
-                payment_requirements=payment_requirements
-            )
+            async with deadline.bounded(FACILITATOR_TIMEOUT_SECONDS):
+                verify_response = await self._facilitator.verify(
+                    payment=payment_payload,
+                    payment_requirements=payment_requirements
+                )
 
             if not verify_response.is_valid:
                 logger.error(f"Payment verification failed: {verify_response.invalid_reason}")
@@ -320,10 +326,11 @@ class CoffeeShopAgent(BaseAgent):
 
             # Settle Payment
             logger.info("Settling payment...")
-            settle_response = await self._facilitator.settle(
-                payment=payment_payload,
-                payment_requirements=payment_requirements
-            )
+            async with deadline.bounded(FACILITATOR_TIMEOUT_SECONDS):
+                settle_response = await self._facilitator.settle(
+                    payment=payment_payload,
+                    payment_requirements=payment_requirements
+                )
             
             if not settle_response.success:
                  logger.error(f"Payment settlement failed: {settle_response.error_reason}")
@@ -335,12 +342,51 @@ class CoffeeShopAgent(BaseAgent):
                 "status": "SUCCESS",
                 "message": "☕ 결제가 완료되었습니다! 음료를 준비하겠습니다.",
                 "transaction": settle_response.transaction,
+                # Lets the executor compact this order's history
+                compaction.CYCLE_SUMMARY_KEY: (
+                    f"{payment_requirements.description} 결제 완료 "
+                    f"(tx {settle_response.transaction})"
+                ),
             }
 
         except Exception as e:
             logger.error(f"An error occurred during payment processing: {e}", exc_info=True)
             return {"error": f"An unexpected error occurred: {e}"}
 
+    def _load_payment_requirements(self, state) -> None:
+        """Loads the payment requirements saved by create_order for this request, if any."""
+        requirements_dict = state.get("payment_requirements")
+        if requirements_dict:
+            _payment_requirements.set(PaymentRequirements(**requirements_dict))
+            logger.info("Loaded payment requirements from session state.")
+        else:
+            _payment_requirements.set(None)
+
+    @override
+    def route_mandate(
+        self, data: dict[str, Any], state: dict[str, Any]
+    ) -> tuple[str, dict[str, Any]] | None:
+        """
+        Sends signed mandates straight to their tool. PaymentMandates always
+        go to process_payment; IntentMandates go to create_order when they
+        list SKUs, otherwise the LLM reads the natural language description.
+        """
+        if "payment_mandate_contents" in data or (
+            "payment_response" in data and "user_authorization" in data
+        ):
+            self._load_payment_requirements(state)
+            return "process_payment", {"payment_mandate": data}
+
+        intent = data.get("signed_intent_mandate", data)
+        if (
+            isinstance(intent, dict)
+            and "natural_language_description" in intent
+            and "intent_expiry" in intent
+            and intent.get("skus")
+        ):
+            return "create_order", {"items": items_from_skus(intent["skus"])}
+        return None
+
     def before_agent_callback(self, callback_context: CallbackContext):
         """
         Callback executed before the agent is invoked.
@@ -348,12 +394,7 @@ class CoffeeShopAgent(BaseAgent):
         """
         if callback_context.state:
             # Load payment requirements if they exist
-            requirements_dict = callback_context.state.get("payment_requirements")
-            if requirements_dict:
-                self._current_payment_requirements = PaymentRequirements(**requirements_dict)
-                logger.info("Loaded payment requirements from session state.")
-            else:
-                self._current_payment_requirements = None
+            self._load_payment_requirements(callback_context.state)
 
             # Check if payment was verified
             payment_data = callback_context.state.get("payment_verified_data")
@@ -384,6 +425,8 @@ class CoffeeShopAgent(BaseAgent):
 2. **주문 접수**: 고객이 음료를 주문하면 `create_order` 도구를 사용하세요.
    - 음료 이름, 사이즈(Short/Tall/Grande/Venti), 원두(일반/디카페인/하프디카페인)를 확인하세요.
    - 사이즈나 원두를 지정하지 않으면 기본값(Tall, 일반)을 사용하세요.
+   - 여러 잔이나 여러 종류를 주문하면 `items` 목록으로 **한 번만** 호출하세요.
+     예: `items=[{"drink": "아메리카노", "quantity": 8}, {"drink": "카페라떼", "size": "Grande", "quantity": 4}]`
 3. **결제 처리**: PaymentMandate를 받으면 `process_payment` 도구를 사용하세요.
 
 ## 중요: 메시지 유형 식별 방법
@@ -414,8 +457,13 @@ class CoffeeShopAgent(BaseAgent):
 
 항상 친절하고 밝은 톤으로 응대하세요! ☕
 """,
-            tools=[self.get_menu, self.create_order, self.process_payment],
+            # get_menu is sync; run it off the event loop like the others
+            tools=offload_sync_tools(
+                [self.get_menu, self.create_order, self.process_payment]
+            ),
             before_agent_callback=self.before_agent_callback,
+            # Reports order cycles finished by tools the runner calls itself
+            after_tool_callback=compaction.after_tool_callback,
         )
 
     @override
@@ -424,7 +472,7 @@ class CoffeeShopAgent(BaseAgent):
         from google.adk.a2a.utils.agent_card_builder import AgentCardBuilder
 
         capabilities = AgentCapabilities(
-            streaming=False,
+            streaming=True,
             extensions=[
                 get_extension_declaration(
                     description="Supports payments using the x402 protocol for USDC on Base Sepolia.",
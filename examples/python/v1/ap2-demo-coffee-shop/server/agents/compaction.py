@@ -0,0 +1,237 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Conversation history compaction for long-lived sessions.
+
+Regulars reuse one context id across many orders, and every model turn
+carries the session's full history. Compaction appends ADK compaction
+events: the model then sees the event's short summary in place of the
+events it covers, while the session keeps its events and state.
+
+Two rules apply:
+- When an order cycle settles, everything since the previous compaction
+  is replaced by a one-line summary of that order.
+- When the history the model would see exceeds the event, token or summary
+  budget, all of it is annulled with a rewind event (ADK shows compaction
+  summaries forever otherwise) and replaced by the most recent summaries.
+
+Live state (e.g. payment_requirements) is session state, not history, and
+is never compacted.
+
+A tool finishes an order cycle by returning a "cycle_summary". Whoever runs
+the tool (the executor's fast path, or ADK through after_tool_callback)
+reports it to the request's collector and keeps it from the model.
+"""
+
+import contextlib
+import os
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from google.adk.events import Event, EventActions
+from google.adk.events.event_actions import EventCompaction
+from google.genai import types
+
+SUMMARY_HEADER = "[이전 주문 기록]"
+TRUNCATED_NOTE = "(이전 대화는 생략되었습니다.)"
+
+# Tool result key carrying the summary of the order cycle the tool finished
+CYCLE_SUMMARY_KEY = "cycle_summary"
+
+# Receives the summaries of order cycles finished by the current request
+_cycle_collector: ContextVar[Callable[[str], None] | None] = ContextVar(
+    "cycle_collector", default=None
+)
+
+
+@dataclass(frozen=True)
+class CompactionPolicy:
+    """Budgets for the history sent to the model with every turn."""
+
+    max_events: int = 200
+    # Estimated at four characters per token
+    max_tokens: int = 32_000
+    # Order summaries kept when the budget forces a full compaction
+    max_summaries: int = 10
+
+    @classmethod
+    def from_env(cls) -> "CompactionPolicy":
+        return cls(
+            max_events=int(os.getenv("SESSION_MAX_EVENTS", cls.max_events)),
+            max_tokens=int(os.getenv("SESSION_MAX_TOKENS", cls.max_tokens)),
+            max_summaries=int(os.getenv("SESSION_MAX_SUMMARIES", cls.max_summaries)),
+        )
+
+
+def _compaction(event: Event) -> EventCompaction | None:
+    """The event's compaction, if it is a compaction event."""
+    return event.actions.compaction if event.actions else None
+
+
+def _is_compaction(event: Event) -> bool:
+    return _compaction(event) is not None
+
+
+def _without_rewound(events: list[Event]) -> list[Event]:
+    """Drops rewind events and the events they annul, as ADK does."""
+    kept = []
+    i = len(events) - 1
+    while i >= 0:
+        event = events[i]
+        target = event.actions.rewind_before_invocation_id if event.actions else None
+        if target:
+            i = next((j for j in range(i) if events[j].invocation_id == target), i)
+        else:
+            kept.append(event)
+        i -= 1
+    kept.reverse()
+    return kept
+
+
+def visible_events(events: list[Event]) -> list[Event]:
+    """
+    The events the model sees, following ADK's rules: rewinds annul
+    events, and a compaction event stands in for every event from its start
+    timestamp up to itself.
+    """
+    visible = []
+    boundary = float("inf")
+    for event in reversed(_without_rewound(events)):
+        if (compaction := _compaction(event)) is not None:
+            visible.append(event)
+            boundary = min(boundary, compaction.start_timestamp)
+        elif event.content and event.timestamp < boundary:
+            visible.append(event)
+    visible.reverse()
+    return visible
+
+
+def estimate_tokens(events: list[Event]) -> int:
+    """Rough token count of the events' contents."""
+    chars = 0
+    for event in events:
+        compaction = _compaction(event)
+        content = compaction.compacted_content if compaction else event.content
+        if content is not None:
+            chars += len(content.model_dump_json(exclude_none=True))
+    return chars // 4
+
+
+def over_budget(policy: CompactionPolicy, events: list[Event]) -> bool:
+    """True if the history the model would see exceeds the policy's budget."""
+    visible = visible_events(events)
+    return (
+        len(visible) > policy.max_events
+        or sum(map(_is_compaction, visible)) > policy.max_summaries
+        or estimate_tokens(visible) > policy.max_tokens
+    )
+
+
+def _summary_texts(events: list[Event]) -> list[str]:
+    """Order summaries from the compaction events the model still sees."""
+    texts = []
+    for event in visible_events(events):
+        compaction = _compaction(event)
+        if compaction and compaction.compacted_content:
+            for part in compaction.compacted_content.parts or []:
+                for line in (part.text or "").splitlines():
+                    if line and line not in (SUMMARY_HEADER, TRUNCATED_NOTE):
+                        texts.append(line)
+    return texts
+
+
+def _compaction_event(author: str, covered: list[Event], lines: list[str]) -> Event:
+    # With nothing to cover, the summary is only added (it hides no event)
+    start = covered[0].timestamp if covered else time.time()
+    end = covered[-1].timestamp if covered else start
+    return Event(
+        author=author,
+        # Rewinds locate events by invocation id, so ours need one
+        invocation_id=f"compaction-{uuid.uuid4()}",
+        actions=EventActions(
+            compaction=EventCompaction(
+                start_timestamp=start,
+                end_timestamp=end,
+                compacted_content=types.ModelContent("\n".join([SUMMARY_HEADER, *lines])),
+            )
+        ),
+    )
+
+
+def cycle_compaction(author: str, events: list[Event], summaries: list[str]) -> Event:
+    """
+    Compacts the events since the last compaction (one finished order
+    cycle) into its summaries.
+    """
+    last = max(
+        (i for i, event in enumerate(events) if _is_compaction(event)), default=-1
+    )
+    covered = [event for event in events[last + 1 :] if event.content]
+    return _compaction_event(author, covered, [f"- {summary}" for summary in summaries])
+
+
+def budget_compaction(
+    author: str, events: list[Event], policy: CompactionPolicy
+) -> list[Event]:
+    """
+    Returns the events that replace the whole history with its latest order
+    summaries, for a session over budget: a rewind annulling everything,
+    then the summary.
+    """
+    summaries = _summary_texts(events)[-policy.max_summaries :]
+    replacement = []
+    first = next((event.invocation_id for event in events if event.invocation_id), None)
+    if first is not None:
+        replacement.append(
+            Event(
+                author=author,
+                invocation_id=f"compaction-{uuid.uuid4()}",
+                actions=EventActions(rewind_before_invocation_id=first),
+            )
+        )
+    replacement.append(_compaction_event(author, events, [*summaries, TRUNCATED_NOTE]))
+    return replacement
+
+
+@contextlib.contextmanager
+def collect_cycles(collector: Callable[[str], None]) -> Iterator[None]:
+    """Sends the order cycles finished by tools in the enclosed code to collector."""
+    token = _cycle_collector.set(collector)
+    try:
+        yield
+    finally:
+        _cycle_collector.reset(token)
+
+
+def pop_cycle_summary(tool_result: Any) -> None:
+    """Removes a tool result's cycle summary and reports it to the request's collector."""
+    if isinstance(tool_result, dict) and CYCLE_SUMMARY_KEY in tool_result:
+        summary = tool_result.pop(CYCLE_SUMMARY_KEY)
+        collector = _cycle_collector.get()
+        if collector is not None:
+            collector(summary)
+
+
+def after_tool_callback(
+    tool: Any, args: dict[str, Any], tool_context: Any, tool_response: Any
+) -> None:
+    """
+    ADK after_tool_callback for tools the runner calls itself: reports
+    their finished order cycles, so the model never sees the summary.
+    """
+    pop_cycle_summary(tool_response)
@@ -13,8 +13,24 @@
 # limitations under the License.
 """Coffee shop menu, sizes, and bean options with pricing logic."""
 
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import Any
 
+from common import codec
+
+from .aliases import NameIndex
+
+logger = logging.getLogger(__name__)
+
+# Built-in catalog, used unless MENU_CATALOG_PATH points at a catalog file.
 # Base menu prices in micro USDC (1 USDC = 1,000,000 micro USDC)
 # Prices are based on Tall size
 MENU: dict[str, dict[str, Any]] = {
@@ -22,31 +38,37 @@ MENU: dict[str, dict[str, Any]] = {
         "base_price": 45_000,  # $0.045 (1/100 of $4.50)
         "description": "진한 에스프레소",
         "description_en": "Rich espresso with water",
+        "aliases": ["americano", "caffe americano", "카페 아메리카노"],
     },
     "카페라떼": {
         "base_price": 50_000,  # $0.050 (1/100 of $5.00)
         "description": "부드러운 우유와 에스프레소",
         "description_en": "Smooth milk with espresso",
+        "aliases": ["cafe latte", "caffe latte", "latte", "라떼", "라테", "카페라테"],
     },
     "카푸치노": {
         "base_price": 55_000,  # $0.055 (1/100 of $5.50)
         "description": "풍성한 거품",
         "description_en": "Rich foam with espresso",
+        "aliases": ["cappuccino", "카프치노"],
     },
     "바닐라라떼": {
         "base_price": 60_000,  # $0.060 (1/100 of $6.00)
         "description": "달콤한 바닐라 향",
         "description_en": "Sweet vanilla latte",
+        "aliases": ["vanilla latte", "바닐라 라떼", "바닐라라테"],
     },
     "카라멜마끼아또": {
         "base_price": 65_000,  # $0.065 (1/100 of $6.50)
         "description": "달콤한 카라멜 드리즐",
         "description_en": "Sweet caramel drizzle",
+        "aliases": ["caramel macchiato", "카라멜 마키아또", "캬라멜마끼아또"],
     },
     "모카": {
         "base_price": 60_000,  # $0.060 (1/100 of $6.00)
         "description": "초콜릿과 에스프레소의 조화",
         "description_en": "Chocolate and espresso harmony",
+        "aliases": ["mocha", "cafe mocha", "caffe mocha", "카페모카"],
     },
 }
 
@@ -56,21 +78,25 @@ SIZES: dict[str, dict[str, Any]] = {
         "price_diff": -5_000,  # -$0.005 (1/100 of $0.50)
         "volume": "237ml",
         "volume_oz": "8oz",
+        "aliases": ["숏", "small"],
     },
     "Tall": {
         "price_diff": 0,  # Base price
         "volume": "355ml",
         "volume_oz": "12oz",
+        "aliases": ["톨", "regular size"],
     },
     "Grande": {
         "price_diff": 5_000,  # +$0.005 (1/100 of $0.50)
         "volume": "473ml",
         "volume_oz": "16oz",
+        "aliases": ["그란데", "large"],
     },
     "Venti": {
         "price_diff": 10_000,  # +$0.010 (1/100 of $1.00)
         "volume": "591ml",
         "volume_oz": "20oz",
+        "aliases": ["벤티", "extra large"],
     },
 }
 
@@ -80,16 +106,19 @@ BEANS: dict[str, dict[str, Any]] = {
         "price_diff": 0,
         "description": "하우스 블렌드",
         "description_en": "House blend",
+        "aliases": ["regular", "house", "house blend", "기본"],
     },
     "디카페인": {
         "price_diff": 3_000,  # +$0.003 (1/100 of $0.30)
         "description": "카페인 제거 원두",
         "description_en": "Decaffeinated beans",
+        "aliases": ["decaf", "decaffeinated", "디카프"],
     },
     "하프디카페인": {
         "price_diff": 3_000,  # +$0.003 (1/100 of $0.30)
         "description": "50% 디카페인 블렌드",
         "description_en": "50% decaf blend",
+        "aliases": ["half decaf", "half-decaf", "하프 디카페인", "반디카페인"],
     },
 }
 
@@ -98,6 +127,298 @@ DEFAULT_SIZE = "Tall"
 DEFAULT_BEAN = "일반"
 
 
+@dataclass(frozen=True)
+class CompiledCatalog:
+    """
+    Versioned, columnar snapshot of the catalog used for pricing.
+
+    Drink, size and bean names are interned to dense integer ids, and every
+    (drink, size, bean) price is precomputed into one contiguous table
+    indexed by (drink_id * n_sizes + size_id) * n_beans + bean_id.
+    combo_index maps a name tuple straight to its table index.
+
+    Snapshots are immutable; a catalog reload swaps in a new version, so an
+    order keeps pricing against the snapshot it started with. Derived views
+    (menu display, serialized menu) are built once per version.
+    """
+
+    version: int
+    menu: dict[str, dict[str, Any]]
+    sizes: dict[str, dict[str, Any]]
+    beans: dict[str, dict[str, Any]]
+    drink_names: tuple[str, ...]
+    size_names: tuple[str, ...]
+    bean_names: tuple[str, ...]
+    drink_ids: dict[str, int]
+    size_ids: dict[str, int]
+    bean_ids: dict[str, int]
+    price_table: array
+    combo_index: dict[tuple[str, str, str], int]
+
+    @classmethod
+    def compile(
+        cls,
+        menu: dict[str, dict[str, Any]],
+        sizes: dict[str, dict[str, Any]],
+        beans: dict[str, dict[str, Any]],
+        version: int = 1,
+    ) -> "CompiledCatalog":
+        """Builds the compiled catalog from MENU/SIZES/BEANS-shaped dicts."""
+        base_prices = array("q", (info["base_price"] for info in menu.values()))
+        size_diffs = array("q", (info["price_diff"] for info in sizes.values()))
+        bean_diffs = array("q", (info["price_diff"] for info in beans.values()))
+        price_table = array(
+            "q",
+            (
+                base + size_diff + bean_diff
+                for base in base_prices
+                for size_diff in size_diffs
+                for bean_diff in bean_diffs
+            ),
+        )
+        return cls(
+            version=version,
+            menu=menu,
+            sizes=sizes,
+            beans=beans,
+            drink_names=tuple(menu),
+            size_names=tuple(sizes),
+            bean_names=tuple(beans),
+            drink_ids={name: i for i, name in enumerate(menu)},
+            size_ids={name: i for i, name in enumerate(sizes)},
+            bean_ids={name: i for i, name in enumerate(beans)},
+            price_table=price_table,
+            combo_index={
+                combo: i
+                for i, combo in enumerate(
+                    (drink, size, bean) for drink in menu for size in sizes for bean in beans
+                )
+            },
+        )
+
+    @functools.cached_property
+    def drink_index(self) -> NameIndex:
+        """Alias/fuzzy index over drink names, built once per version."""
+        return NameIndex((name, info.get("aliases", ())) for name, info in self.menu.items())
+
+    @functools.cached_property
+    def size_index(self) -> NameIndex:
+        """Alias/fuzzy index over size names, built once per version."""
+        return NameIndex((name, info.get("aliases", ())) for name, info in self.sizes.items())
+
+    @functools.cached_property
+    def bean_index(self) -> NameIndex:
+        """Alias/fuzzy index over bean names, built once per version."""
+        return NameIndex((name, info.get("aliases", ())) for name, info in self.beans.items())
+
+    def normalize(self, drink: str, size: str, bean: str) -> tuple[str, str, str]:
+        """
+        Maps user-supplied names (English names, spacing, casing, typos) to
+        catalog keys. Names that cannot be resolved are returned unchanged so
+        validation can report them.
+        """
+        return (
+            self.drink_index.resolve(drink) or drink,
+            self.size_index.resolve(size) or size,
+            self.bean_index.resolve(bean) or bean,
+        )
+
+    def validate(self, drink: str, size: str, bean: str) -> tuple[bool, str]:
+        """Validates names against the catalog. See validate_order."""
+        if drink not in self.drink_ids:
+            return False, f"'{drink}'은(는) 메뉴에 없습니다. 가능한 메뉴: {', '.join(self.drink_names)}"
+        if size not in self.size_ids:
+            return False, f"'{size}'은(는) 올바른 사이즈가 아닙니다. 가능한 사이즈: {', '.join(self.size_names)}"
+        if bean not in self.bean_ids:
+            return False, f"'{bean}'은(는) 올바른 원두 옵션이 아닙니다. 가능한 옵션: {', '.join(self.bean_names)}"
+        return True, ""
+
+    def intern(self, drink: str, size: str, bean: str) -> int:
+        """
+        Returns the price table index for a configuration.
+
+        Raises:
+            ValueError: If drink, size, or bean is not valid
+        """
+        index = self.combo_index.get((drink, size, bean))
+        if index is not None:
+            return index
+        if drink not in self.drink_ids:
+            raise ValueError(f"Unknown drink: {drink}. Available: {list(self.drink_names)}")
+        if size not in self.size_ids:
+            raise ValueError(f"Unknown size: {size}. Available: {list(self.size_names)}")
+        raise ValueError(f"Unknown bean: {bean}. Available: {list(self.bean_names)}")
+
+    def quote(self, drink: str, size: str, bean: str) -> int:
+        """Returns the price in micro USDC for one configuration."""
+        return self.price_table[self.intern(drink, size, bean)]
+
+    def quote_many(self, orders: Iterable[tuple[str, str, str]]) -> list[int]:
+        """
+        Prices many (drink, size, bean) tuples in one pass.
+
+        Each tuple resolves to its price table index with one dict lookup,
+        then prices are gathered from the contiguous table.
+
+        Raises:
+            ValueError: If any configuration is not valid
+        """
+        combo_index = self.combo_index
+        orders = list(orders)
+        try:
+            indices = [combo_index[order] for order in orders]
+        except (KeyError, TypeError):
+            # Re-run through intern() to report the offending name
+            indices = [self.intern(drink, size, bean) for drink, size, bean in orders]
+        table = self.price_table
+        return [table[i] for i in indices]
+
+    @functools.cached_property
+    def display(self) -> dict[str, Any]:
+        """Menu display for this version. See get_menu_display."""
+        return _build_menu_display(self)
+
+    @functools.cached_property
+    def document(self) -> tuple[bytes, str]:
+        """Menu display serialized as JSON bytes, with its ETag."""
+        body = codec.dumps(self.display)
+        etag = f'"v{self.version}-{hashlib.sha256(body).hexdigest()[:32]}"'
+        return body, etag
+
+
+def _check_section(
+    section: Any, name: str, price_key: str, text_keys: tuple[str, ...]
+) -> None:
+    if not isinstance(section, dict) or not section:
+        raise TypeError(f"'{name}' must be a non-empty object")
+    for key, info in section.items():
+        if not isinstance(info, dict):
+            raise TypeError(f"{name}.{key} must be an object")
+        price = info.get(price_key)
+        if not isinstance(price, int) or isinstance(price, bool):
+            raise TypeError(f"{name}.{key}.{price_key} must be an integer")
+        for text_key in text_keys:
+            if not isinstance(info.get(text_key), str):
+                raise TypeError(f"{name}.{key}.{text_key} must be a string")
+        aliases = info.get("aliases", [])
+        if not isinstance(aliases, list) or not all(isinstance(a, str) for a in aliases):
+            raise TypeError(f"{name}.{key}.aliases must be a list of strings")
+
+
+def validate_catalog(data: Any) -> None:
+    """
+    Checks a catalog file's contents before they are compiled.
+
+    Raises:
+        TypeError: If a section is missing or empty, or a field has the
+            wrong type
+        ValueError: If the default size or bean is missing, or a combination
+            would not have a positive price
+    """
+    if not isinstance(data, dict):
+        raise TypeError("The catalog must be an object")
+    _check_section(data.get("menu"), "menu", "base_price", ("description",))
+    _check_section(data.get("sizes"), "sizes", "price_diff", ("volume",))
+    _check_section(data.get("beans"), "beans", "price_diff", ("description",))
+    if DEFAULT_SIZE not in data["sizes"] or DEFAULT_BEAN not in data["beans"]:
+        raise ValueError(f"The catalog must offer {DEFAULT_SIZE} and {DEFAULT_BEAN}")
+    cheapest = (
+        min(info["base_price"] for info in data["menu"].values())
+        + min(info["price_diff"] for info in data["sizes"].values())
+        + min(info["price_diff"] for info in data["beans"].values())
+    )
+    if cheapest <= 0:
+        raise ValueError("Every drink, size and bean combination must have a positive price")
+
+
+class CatalogStore:
+    """
+    Holds the current catalog snapshot and hot-reloads it from a JSON file.
+
+    The file has "menu", "sizes" and "beans" objects shaped like MENU, SIZES
+    and BEANS. Its modification time is checked at most once per
+    `check_interval` seconds; a changed file is compiled into a new version
+    and swapped in atomically. Only one caller checks and reloads at a time;
+    the others keep using the current snapshot meanwhile. A file that fails
+    validate_catalog is logged and ignored, keeping the current version.
+    """
+
+    def __init__(self, path: str | None = None, check_interval: float = 1.0):
+        self._path = path
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._next_check = 0.0
+        self._catalog = CompiledCatalog.compile(MENU, SIZES, BEANS, version=1)
+        if path:
+            self.reload()
+
+    def get(self) -> CompiledCatalog:
+        """Returns the current snapshot, reloading first if the file changed."""
+        if self._path and time.monotonic() >= self._next_check:
+            self._check()
+        return self._catalog
+
+    def _check(self) -> None:
+        """Reloads the file if it changed. Skipped while another caller checks."""
+        if self._path is None or not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self._check_interval
+            try:
+                mtime: float | None = os.stat(self._path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime is not None and mtime != self._mtime:
+                self._reload()
+        finally:
+            self._lock.release()
+
+    def reload(self) -> CompiledCatalog:
+        """Compiles the catalog file into a new version and swaps it in."""
+        with self._lock:
+            return self._reload()
+
+    def _reload(self) -> CompiledCatalog:
+        # Called with the lock held
+        if self._path is None:
+            # Built-in catalog only; there is no file to reload
+            return self._catalog
+        try:
+            # Remember the attempt so a broken file is not retried until
+            # it changes again
+            self._mtime = os.stat(self._path).st_mtime
+            with open(self._path, "rb") as f:
+                data = codec.loads(f.read())
+            validate_catalog(data)
+            catalog = CompiledCatalog.compile(
+                data["menu"],
+                data["sizes"],
+                data["beans"],
+                version=self._catalog.version + 1,
+            )
+            # Build the derived views now, so a problem surfaces here rather
+            # than on a request
+            for view in ("document", "drink_index", "size_index", "bean_index"):
+                getattr(catalog, view)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to load catalog from {self._path}: {e}")
+            return self._catalog
+        self._catalog = catalog
+        logger.info(f"Loaded catalog version {catalog.version} from {self._path}")
+        return catalog
+
+
+_store = CatalogStore(os.getenv("MENU_CATALOG_PATH"))
+
+
+def get_catalog() -> CompiledCatalog:
+    """Returns the current catalog snapshot used for pricing and validation."""
+    return _store.get()
+
+
 def calculate_price(drink: str, size: str = DEFAULT_SIZE, bean: str = DEFAULT_BEAN) -> int:
     """
     Calculate the total price for a drink with options.
@@ -113,18 +434,20 @@ def calculate_price(drink: str, size: str = DEFAULT_SIZE, bean: str = DEFAULT_BE
     Raises:
         ValueError: If drink, size, or bean is not valid
     """
-    if drink not in MENU:
-        raise ValueError(f"Unknown drink: {drink}. Available: {list(MENU.keys())}")
-    if size not in SIZES:
-        raise ValueError(f"Unknown size: {size}. Available: {list(SIZES.keys())}")
-    if bean not in BEANS:
-        raise ValueError(f"Unknown bean: {bean}. Available: {list(BEANS.keys())}")
-    
-    base_price = MENU[drink]["base_price"]
-    size_diff = SIZES[size]["price_diff"]
-    bean_diff = BEANS[bean]["price_diff"]
-    
-    return base_price + size_diff + bean_diff
+    return get_catalog().quote(drink, size, bean)
+
+
+def quote_many(orders: Iterable[tuple[str, str, str]]) -> list[int]:
+    """
+    Calculate prices for many (drink, size, bean) tuples at once.
+
+    Returns:
+        Prices in micro USDC, in the same order as the input
+
+    Raises:
+        ValueError: If any configuration is not valid
+    """
+    return get_catalog().quote_many(orders)
 
 
 def format_price_usd(price_micro: int) -> str:
@@ -132,15 +455,34 @@ def format_price_usd(price_micro: int) -> str:
     return f"${price_micro / 1_000_000:.2f}"
 
 
-def get_menu_display() -> dict[str, Any]:
+def format_amount_usd(price_micro: int) -> str:
+    """
+    Formats a micro USDC amount as an exact USD decimal with USDC's six
+    places, e.g. 45000 -> "0.045000". Unlike format_price_usd, amounts
+    formatted this way add up exactly like maxAmountRequired.
+    """
+    sign = "-" if price_micro < 0 else ""
+    whole, fraction = divmod(abs(price_micro), 1_000_000)
+    return f"{sign}{whole}.{fraction:06d}"
+
+
+def get_menu_display(catalog: CompiledCatalog | None = None) -> dict[str, Any]:
     """
     Get formatted menu for display to customers.
-    
+
+    Args:
+        catalog: Snapshot to display; defaults to the current catalog
+
     Returns:
         Dictionary with menu items, sizes, and bean options
     """
+    return (catalog or get_catalog()).display
+
+
+def _build_menu_display(catalog: CompiledCatalog) -> dict[str, Any]:
+    """Builds the menu display for a catalog snapshot."""
     menu_items = []
-    for name, info in MENU.items():
+    for name, info in catalog.menu.items():
         menu_items.append({
             "name": name,
             "base_price_usd": format_price_usd(info["base_price"]),
@@ -149,7 +491,7 @@ def get_menu_display() -> dict[str, Any]:
         })
     
     size_options = []
-    for name, info in SIZES.items():
+    for name, info in catalog.sizes.items():
         diff_str = ""
         if info["price_diff"] > 0:
             diff_str = f"+{format_price_usd(info['price_diff'])}"
@@ -165,7 +507,7 @@ def get_menu_display() -> dict[str, Any]:
         })
     
     bean_options = []
-    for name, info in BEANS.items():
+    for name, info in catalog.beans.items():
         diff_str = ""
         if info["price_diff"] > 0:
             diff_str = f"+{format_price_usd(info['price_diff'])}"
@@ -186,6 +528,15 @@ def get_menu_display() -> dict[str, Any]:
     }
 
 
+def get_menu_document() -> tuple[bytes, str]:
+    """
+    Get the menu display pre-serialized as JSON bytes, with its ETag.
+
+    Built once per catalog version and reused by the HTTP /menu route.
+    """
+    return get_catalog().document
+
+
 def validate_order(drink: str, size: str, bean: str) -> tuple[bool, str]:
     """
     Validate order parameters.
@@ -193,13 +544,28 @@ def validate_order(drink: str, size: str, bean: str) -> tuple[bool, str]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if drink not in MENU:
-        return False, f"'{drink}'은(는) 메뉴에 없습니다. 가능한 메뉴: {', '.join(MENU.keys())}"
-    if size not in SIZES:
-        return False, f"'{size}'은(는) 올바른 사이즈가 아닙니다. 가능한 사이즈: {', '.join(SIZES.keys())}"
-    if bean not in BEANS:
-        return False, f"'{bean}'은(는) 올바른 원두 옵션이 아닙니다. 가능한 옵션: {', '.join(BEANS.keys())}"
-    return True, ""
+    return get_catalog().validate(drink, size, bean)
+
+
+def items_from_skus(skus: Iterable[str]) -> list[dict[str, Any]]:
+    """
+    Converts IntentMandate SKUs into create_order line items.
+
+    A SKU is "drink", "drink/size" or "drink/size/bean" for one drink, so
+    repeating a SKU orders more of it. Names are normalized by create_order.
+    """
+    quantities: dict[tuple[str, str, str], int] = {}
+    for sku in skus:
+        parts = [part.strip() for part in str(sku).split("/")]
+        drink = parts[0]
+        size = parts[1] if len(parts) > 1 and parts[1] else DEFAULT_SIZE
+        bean = parts[2] if len(parts) > 2 and parts[2] else DEFAULT_BEAN
+        config = (drink, size, bean)
+        quantities[config] = quantities.get(config, 0) + 1
+    return [
+        {"drink": drink, "size": size, "bean": bean, "quantity": quantity}
+        for (drink, size, bean), quantity in quantities.items()
+    ]
 
 
 def get_order_description(drink: str, size: str, bean: str) -> str:
@@ -27,7 +27,7 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from starlette.routing import BaseRoute, Route
 
-from ._adk_agent_executor import ADKAgentExecutor
+from ._adk_agent_executor import ADKAgentExecutor, MandateRouter
 from .base_agent import BaseAgent
 from .coffee_shop_agent import CoffeeShopAgent
 from .x402_executor import CoffeeShopExecutor
@@ -68,6 +68,7 @@ async def create_agent_routes(base_url: str, base_path: str) -> List[BaseRoute]:
                 full_path=full_path,
                 agent_card=await agent_factory.create_agent_card(url),
                 agent=agent_factory.create_agent(),
+                mandate_router=agent_factory.route_mandate,
                 artifact_service=InMemoryArtifactService(),
                 session_service=InMemorySessionService(),
                 memory_service=InMemoryMemoryService(),
@@ -82,6 +83,7 @@ async def _create_routes(
     full_path: str,
     agent_card: AgentCard,
     agent: LlmAgent,
+    mandate_router: MandateRouter,
     artifact_service: InMemoryArtifactService,
     session_service: InMemorySessionService,
     memory_service: InMemoryMemoryService,
@@ -99,7 +101,7 @@ async def _create_routes(
     )
 
     # 1. Create base executor
-    agent_executor = ADKAgentExecutor(runner, agent_card)
+    agent_executor = ADKAgentExecutor(runner, agent_card, mandate_router=mandate_router)
 
     # 2. Wrap with x402 executor for payment handling
     agent_executor = CoffeeShopExecutor(agent_executor)
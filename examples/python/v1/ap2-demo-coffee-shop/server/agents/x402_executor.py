@@ -13,9 +13,13 @@
 # limitations under the License.
 """x402 Executor for the coffee shop using Coinbase Facilitator."""
 
+import logging
+import os
 from typing import override
 
 from a2a.server.agent_execution import AgentExecutor
+from a2a.server.agent_execution.context import RequestContext
+from a2a.server.events.event_queue import EventQueue
 
 from x402_a2a import FacilitatorClient, FacilitatorConfig, x402ExtensionConfig
 from x402_a2a.executors import x402ServerExecutor
@@ -26,6 +30,14 @@ from x402_a2a.types import (
     VerifyResponse,
 )
 
+from common import deadline, logs
+
+# Payment verification and settlement; sample with LOG_SAMPLE_RATES
+logger = logging.getLogger("x402.payments")
+
+# Facilitator request timeout in seconds, shortened by the task's deadline
+FACILITATOR_TIMEOUT_SECONDS = float(os.getenv("FACILITATOR_TIMEOUT_SECONDS", "30"))
+
 
 class CoffeeShopExecutor(x402ServerExecutor):
     """
@@ -56,7 +68,21 @@ class CoffeeShopExecutor(x402ServerExecutor):
         else:
             # Default to Coinbase facilitator
             self._facilitator = FacilitatorClient()
-            print("☕ Using Coinbase Facilitator: https://x402.org/facilitator")
+            logger.info("☕ Using Coinbase Facilitator: https://x402.org/facilitator")
+
+    @override
+    async def execute(self, context: RequestContext, event_queue: EventQueue):
+        """
+        Runs the task under its deadline, so payment verification and
+        settlement around the agent's run are bounded by it as well.
+        """
+        timeout = deadline.request_timeout(
+            context.metadata,
+            context.message.metadata if context.message else None,
+            default=deadline.default_task_timeout(),
+        )
+        with deadline.scope(timeout):
+            await super().execute(context, event_queue)
 
     @override
     async def verify_payment(
@@ -71,27 +97,27 @@ class CoffeeShopExecutor(x402ServerExecutor):
         - Payment hasn't expired
         - Nonce hasn't been used
         """
-        print(f"🔍 Verifying payment...")
-        print(f"   Network: {payload.network}")
-        print(f"   Scheme: {payload.scheme}")
-        print(f"   Amount: {requirements.max_amount_required} micro USDC")
-        
-        # Log the actual payload being sent to facilitator
-        print(f"📤 Sending to facilitator:")
-        print(f"   Payload: {payload.model_dump()}")
-        print(f"   Requirements: {requirements.model_dump()}")
+        logger.info(
+            "🔍 Verifying payment... Network: %s, Scheme: %s, Amount: %s micro USDC",
+            payload.network,
+            payload.scheme,
+            requirements.max_amount_required,
+        )
 
-        response = await self._facilitator.verify(payload, requirements)
+        # Log the actual payload being sent to facilitator
+        logger.debug(
+            "📤 Sending to facilitator:\n   Payload: %s\n   Requirements: %s",
+            logs.lazy(payload.model_dump),
+            logs.lazy(requirements.model_dump),
+        )
+
+        async with deadline.bounded(FACILITATOR_TIMEOUT_SECONDS):
+            response = await self._facilitator.verify(payload, requirements)
         
-        # Log facilitator response
-        print(f"📥 Facilitator verification response:")
-        print(f"   Valid: {response.is_valid}")
-        print(f"   Reason: {getattr(response, 'invalid_reason', 'N/A')}")
-
         if response.is_valid:
-            print("✅ Payment verified successfully!")
+            logger.info("✅ Payment verified successfully!")
         else:
-            print(f"⛔ Payment verification failed: {response.invalid_reason}")
+            logger.warning("⛔ Payment verification failed: %s", response.invalid_reason)
 
         return response
 
@@ -107,29 +133,26 @@ class CoffeeShopExecutor(x402ServerExecutor):
         - Funds are transferred from customer to merchant wallet
         - Transaction hash is returned
         """
-        print(f"💰 Settling payment on-chain...")
-        print(f"   To: {requirements.pay_to}")
-        
-        # Log the actual payload being sent to facilitator
-        print(f"📤 Sending to facilitator:")
-        print(f"   Payload: {payload.model_dump()}")
-        print(f"   Requirements: {requirements.model_dump()}")
+        logger.info("💰 Settling payment on-chain... To: %s", requirements.pay_to)
 
-        response = await self._facilitator.settle(payload, requirements)
+        # Log the actual payload being sent to facilitator
+        logger.debug(
+            "📤 Sending to facilitator:\n   Payload: %s\n   Requirements: %s",
+            logs.lazy(payload.model_dump),
+            logs.lazy(requirements.model_dump),
+        )
+
+        async with deadline.bounded(FACILITATOR_TIMEOUT_SECONDS):
+            response = await self._facilitator.settle(payload, requirements)
         
-        # Log facilitator response
-        print(f"📥 Facilitator settlement response:")
-        print(f"   Success: {response.success}")
-        print(f"   TX Hash: {getattr(response, 'transaction', 'N/A')}")
-        print(f"   Network: {getattr(response, 'network', 'N/A')}")
-        print(f"   Error: {getattr(response, 'error_reason', 'N/A')}")
-
         if response.success:
-            print(f"✅ Payment settled!")
-            print(f"   TX Hash: {response.transaction}")
-            print(f"   Network: {response.network}")
+            logger.info(
+                "✅ Payment settled! TX Hash: %s, Network: %s",
+                response.transaction,
+                response.network,
+            )
         else:
-            print(f"⛔ Settlement failed: {response.error_reason}")
+            logger.warning("⛔ Settlement failed: %s", response.error_reason)
 
         return response
 
@@ -0,0 +1,603 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""ADKAgentExecutor against a real ADK runner and a scripted model."""
+
+import asyncio
+import threading
+from collections.abc import AsyncGenerator
+
+import pytest
+from a2a.server.agent_execution.context import RequestContext
+from a2a.server.events.event_queue import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import (
+    AgentCapabilities,
+    AgentCard,
+    DataPart,
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from google.adk import Runner
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.sessions import InMemorySessionService
+from google.adk.utils.streaming_utils import StreamingResponseAggregator
+from google.genai import types
+from pydantic import Field
+
+from server.agents import compaction
+from server.agents._adk_agent_executor import (
+    ADKAgentExecutor,
+    _RequestSession,
+    _StatusCoalescer,
+    offload_sync_tools,
+)
+
+
+def _chunk(part: types.Part, last: bool = False) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.ModelContent([part]),
+                finish_reason=types.FinishReason.STOP if last else None,
+            )
+        ]
+    )
+
+
+class _ScriptedModel(BaseLlm):
+    """
+    Replies with scripted chunks, one reply per model call. Streamed replies
+    go through ADK's aggregator, like Gemini's.
+    """
+
+    model: str = "scripted"
+    replies: list[list[types.Part]]
+    requests: list[LlmRequest] = Field(default_factory=list)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse]:
+        self.requests.append(llm_request)
+        parts = self.replies.pop(0)
+        if not stream:
+            yield LlmResponse(content=types.ModelContent(parts))
+            return
+        aggregator = StreamingResponseAggregator()
+        for i, part in enumerate(parts):
+            async for response in aggregator.process_response(
+                _chunk(part, last=i == len(parts) - 1)
+            ):
+                yield response
+        if (final := aggregator.close()) is not None:
+            yield final
+
+
+def _executor(
+    replies, tools, streaming: bool, executor_options=None, **agent_options
+) -> ADKAgentExecutor:
+    agent = LlmAgent(
+        name="shop_agent",
+        model=_ScriptedModel(replies=replies),
+        tools=tools,
+        **agent_options,
+    )
+    runner = Runner(
+        app_name="shop", agent=agent, session_service=InMemorySessionService()
+    )
+    card = AgentCard(
+        name="shop",
+        description="test shop",
+        url="http://localhost/",
+        version="1",
+        capabilities=AgentCapabilities(streaming=streaming),
+        default_input_modes=["text"],
+        default_output_modes=["text"],
+        skills=[],
+    )
+    return ADKAgentExecutor(
+        runner, card, **{"fast_path": "off", **(executor_options or {})}
+    )
+
+
+def _context(text: str | dict) -> RequestContext:
+    part = TextPart(text=text) if isinstance(text, str) else DataPart(data=text)
+    message = Message(
+        role=Role.user,
+        parts=[Part(root=part)],
+        message_id="m1",
+        task_id="t1",
+        context_id="c1",
+    )
+    return RequestContext(
+        request=MessageSendParams(message=message), task_id="t1", context_id="c1"
+    )
+
+
+async def _drain(queue: EventQueue) -> list:
+    events = []
+    while True:
+        try:
+            events.append(await queue.dequeue_event(no_wait=True))
+        except asyncio.QueueEmpty:
+            return events
+
+
+async def _run(executor: ADKAgentExecutor, text: str | dict) -> list:
+    queue = EventQueue()
+    await executor.execute(_context(text), queue)
+    return await _drain(queue)
+
+
+def _artifact_text(events: list) -> str:
+    return "".join(
+        part.root.text
+        for event in events
+        if isinstance(event, TaskArtifactUpdateEvent)
+        for part in event.artifact.parts
+        if isinstance(part.root, TextPart)
+    )
+
+
+def _status_texts(events: list) -> list[str]:
+    """Text of each working status update that carries a message."""
+    return [
+        "".join(
+            part.root.text
+            for part in event.status.message.parts
+            if isinstance(part.root, TextPart)
+        )
+        for event in events
+        if isinstance(event, TaskStatusUpdateEvent)
+        and event.status.state == TaskState.working
+        and event.status.message
+    ]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_text_before_a_tool_call_is_not_the_final_response(streaming):
+    calls = []
+
+    async def create_order(drink: str) -> dict:
+        calls.append(drink)
+        return {"status": "ok"}
+
+    replies = [
+        [
+            types.Part(text="주문을 "),
+            types.Part(text="생성할게요. "),
+            types.Part.from_function_call(name="create_order", args={"drink": "라떼"}),
+        ],
+        [types.Part(text="주문 "), types.Part(text="완료!")],
+    ]
+    executor = _executor(replies, [create_order], streaming)
+
+    events = asyncio.run(_run(executor, "라떼 주세요"))
+
+    assert calls == ["라떼"]
+    assert _artifact_text(events) == "주문 완료!"
+    final = events[-1]
+    assert isinstance(final, TaskStatusUpdateEvent)
+    assert final.status.state == TaskState.completed
+
+
+def test_cancel_stops_the_running_tool_and_cancels_the_task():
+    started = asyncio.Event()
+    tool_cancelled = []
+
+    async def brew(drink: str) -> dict:
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            tool_cancelled.append(drink)
+            raise
+        return {"status": "ok"}
+
+    replies = [[types.Part.from_function_call(name="brew", args={"drink": "라떼"})]]
+    executor = _executor(replies, [brew], streaming=True)
+
+    async def scenario():
+        queue = EventQueue()
+        context = _context("라떼 주세요")
+        run = asyncio.create_task(executor.execute(context, queue))
+        await asyncio.wait_for(started.wait(), 5)
+        await executor.cancel(context, queue)
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        return await _drain(queue)
+
+    events = asyncio.run(scenario())
+
+    assert tool_cancelled == ["라떼"]
+    assert events[-1].status.state == TaskState.canceled
+    assert executor._running_sessions == {}
+
+
+def test_cycles_finished_by_runner_called_tools_are_compacted():
+    async def process_payment(payment_mandate: str) -> dict:
+        return {"status": "SUCCESS", "cycle_summary": "라떼 결제 완료"}
+
+    replies = [
+        [
+            types.Part.from_function_call(
+                name="process_payment", args={"payment_mandate": "{}"}
+            )
+        ],
+        [types.Part(text="결제 완료!")],
+    ]
+    executor = _executor(
+        replies,
+        [process_payment],
+        streaming=False,
+        after_tool_callback=compaction.after_tool_callback,
+    )
+
+    asyncio.run(_run(executor, "결제할게요"))
+
+    model = executor.runner.agent.model
+    response = model.requests[-1].contents[-1].parts[0].function_response.response
+    assert response == {"status": "SUCCESS"}
+    session = asyncio.run(
+        executor.runner.session_service.get_session(
+            app_name="shop", user_id="self", session_id="c1"
+        )
+    )
+    summaries = [
+        event.actions.compaction.compacted_content.parts[0].text
+        for event in session.events
+        if event.actions.compaction
+    ]
+    assert summaries == [f"{compaction.SUMMARY_HEADER}\n- 라떼 결제 완료"]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_a_tool_looping_model_fails_after_the_turn_budget(streaming):
+    calls = []
+
+    async def check_stock(drink: str) -> dict:
+        calls.append(drink)
+        return {"status": "ok"}
+
+    replies = [
+        [types.Part.from_function_call(name="check_stock", args={"drink": "라떼"})]
+        for _ in range(10)
+    ]
+    executor = _executor(
+        replies, [check_stock], streaming, executor_options={"max_turns": 2}
+    )
+
+    events = asyncio.run(_run(executor, "라떼 재고 있나요?"))
+
+    assert len(executor.runner.agent.model.requests) == 2
+    assert calls == ["라떼", "라떼"]
+    assert events[-1].status.state == TaskState.failed
+
+
+def _overlapping_sync_tools() -> list:
+    """Two sync tools that each finish only while the other one is running."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_menu() -> dict:
+        barrier.wait()
+        return {"menu": ["라떼"]}
+
+    def check_stock(drink: str) -> dict:
+        barrier.wait()
+        return {"drink": drink, "in_stock": True}
+
+    return offload_sync_tools([get_menu, check_stock])
+
+
+def _overlapping_async_tools() -> list:
+    """Two async tools that each finish only while the other one is running."""
+    barrier = asyncio.Barrier(2)
+
+    async def get_menu() -> dict:
+        await asyncio.wait_for(barrier.wait(), 5)
+        return {"menu": ["라떼"]}
+
+    async def check_stock(drink: str) -> dict:
+        await asyncio.wait_for(barrier.wait(), 5)
+        return {"drink": drink, "in_stock": True}
+
+    return [get_menu, check_stock]
+
+
+@pytest.mark.parametrize("sync", [False, True])
+def test_the_tool_calls_of_one_reply_run_concurrently(sync):
+    replies = [
+        [
+            types.Part.from_function_call(name="get_menu", args={}),
+            types.Part.from_function_call(name="check_stock", args={"drink": "라떼"}),
+        ],
+        [types.Part(text="라떼 있어요!")],
+    ]
+    tools = _overlapping_sync_tools() if sync else _overlapping_async_tools()
+    executor = _executor(replies, tools, streaming=False)
+
+    events = asyncio.run(_run(executor, "메뉴랑 라떼 재고 알려주세요"))
+
+    responses = executor.runner.agent.model.requests[-1].contents[-1].parts
+    assert [part.function_response.name for part in responses] == [
+        "get_menu",
+        "check_stock",
+    ]
+    assert _artifact_text(events) == "라떼 있어요!"
+
+
+PAYMENT_MANDATE = {"payment_mandate_contents": {"payment_mandate_id": "pm-1"}}
+
+
+def _route_payment(data: dict, state) -> tuple[str, dict] | None:
+    """Routes PaymentMandates to process_payment, like CoffeeShopAgent."""
+    if "payment_mandate_contents" in data:
+        return "process_payment", {"payment_mandate": data}
+    return None
+
+
+def _payment_tool(calls: list) -> list:
+    async def process_payment(payment_mandate: dict) -> dict:
+        calls.append(payment_mandate)
+        return {"status": "SUCCESS", "message": "결제 완료!"}
+
+    return [process_payment]
+
+
+def test_a_payment_mandate_skips_the_model_on_the_direct_fast_path():
+    calls = []
+    executor = _executor(
+        [],
+        _payment_tool(calls),
+        streaming=False,
+        executor_options={"fast_path": "direct", "mandate_router": _route_payment},
+    )
+
+    events = asyncio.run(_run(executor, PAYMENT_MANDATE))
+
+    assert executor.runner.agent.model.requests == []
+    assert calls == [PAYMENT_MANDATE]
+    assert _artifact_text(events) == "결제 완료!"
+    assert events[-1].status.state == TaskState.completed
+
+
+@pytest.mark.parametrize("fast_path", ["llm", "off"])
+def test_a_payment_mandate_pays_once_with_or_without_the_fast_path(fast_path):
+    calls = []
+    replies = [[types.Part(text="결제가 완료되었어요.")]]
+    if fast_path == "off":
+        # Without the fast path the model has to pick the tool itself
+        replies.insert(
+            0,
+            [
+                types.Part.from_function_call(
+                    name="process_payment", args={"payment_mandate": PAYMENT_MANDATE}
+                )
+            ],
+        )
+    executor = _executor(
+        replies,
+        _payment_tool(calls),
+        streaming=False,
+        executor_options={"fast_path": fast_path, "mandate_router": _route_payment},
+    )
+
+    events = asyncio.run(_run(executor, PAYMENT_MANDATE))
+
+    assert calls == [PAYMENT_MANDATE]
+    assert _artifact_text(events) == "결제가 완료되었어요."
+    assert events[-1].status.state == TaskState.completed
+    requests = executor.runner.agent.model.requests
+    if fast_path == "llm":
+        # The fast path only asks the model for the closing message
+        assert len(requests) == 1
+        assert "`process_payment` 도구를 이미 실행했습니다" in (
+            requests[0].contents[-1].parts[0].text
+        )
+    else:
+        assert len(requests) == 2
+
+
+@pytest.mark.parametrize(
+    ("interval", "max_events", "expected"),
+    [
+        # Merged until the interval's timer fires
+        (0.05, 100, ["라떼 준비 중"]),
+        # Published every max_events events, timer or not
+        (60, 2, ["라떼 ", "준비 중"]),
+    ],
+)
+def test_rapid_status_updates_are_merged(interval, max_events, expected):
+    async def scenario():
+        queue = EventQueue()
+        status = _StatusCoalescer(TaskUpdater(queue, "t1", "c1"), interval, max_events)
+        for text in ["라", "떼 ", "준비 ", "중"]:
+            await status.add([types.Part(text=text)])
+        await asyncio.sleep(0.2)
+        status.close()
+        return await _drain(queue)
+
+    assert _status_texts(asyncio.run(scenario())) == expected
+
+
+def test_buffered_status_is_flushed_before_completion():
+    async def create_order(drink: str) -> dict:
+        return {"status": "ok"}
+
+    replies = [
+        [
+            types.Part(text="주문을 "),
+            types.Part(text="생성할게요. "),
+            types.Part.from_function_call(name="create_order", args={"drink": "라떼"}),
+        ],
+        [types.Part(text="주문 "), types.Part(text="완료!")],
+    ]
+    executor = _executor(
+        replies,
+        [create_order],
+        streaming=True,
+        executor_options={"status_interval": 60, "status_max_events": 1000},
+    )
+
+    events = asyncio.run(_run(executor, "라떼 주세요"))
+
+    # Everything streamed during the run goes out as one update, ahead of
+    # the answer and the completed status
+    [streamed] = _status_texts(events)
+    assert streamed.startswith("주문을 생성할게요. ")
+    working = next(
+        i for i, e in enumerate(events) if _status_texts([e]) == [streamed]
+    )
+    artifact = next(
+        i for i, e in enumerate(events) if isinstance(e, TaskArtifactUpdateEvent)
+    )
+    assert working < artifact < len(events) - 1
+    assert events[-1].status.state == TaskState.completed
+
+
+def test_buffered_status_is_flushed_before_cancellation():
+    started = asyncio.Event()
+
+    async def brew(drink: str) -> dict:
+        started.set()
+        await asyncio.sleep(60)
+        return {"status": "ok"}
+
+    replies = [
+        [
+            types.Part(text="주문을 "),
+            types.Part(text="준비할게요. "),
+            types.Part.from_function_call(name="brew", args={"drink": "라떼"}),
+        ]
+    ]
+    executor = _executor(
+        replies,
+        [brew],
+        streaming=True,
+        executor_options={"status_interval": 60, "status_max_events": 1000},
+    )
+
+    async def scenario():
+        queue = EventQueue()
+        context = _context("라떼 주세요")
+        run = asyncio.create_task(executor.execute(context, queue))
+        await asyncio.wait_for(started.wait(), 5)
+        await executor.cancel(context, queue)
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        return await _drain(queue)
+
+    events = asyncio.run(scenario())
+
+    assert _status_texts(events) == ["주문을 준비할게요. "]
+    assert events[-1].status.state == TaskState.canceled
+
+
+def _stored_session(executor: ADKAgentExecutor):
+    return asyncio.run(
+        executor.runner.session_service.get_session(
+            app_name="shop", user_id="self", session_id="c1"
+        )
+    )
+
+
+def test_request_session_reads_once_and_writes_state_in_one_event(monkeypatch):
+    executor = _executor([], [], streaming=False)
+    service = executor.runner.session_service
+    reads = []
+    get_session = service.get_session
+
+    async def counting_get_session(**kwargs):
+        reads.append(kwargs["session_id"])
+        return await get_session(**kwargs)
+
+    monkeypatch.setattr(service, "get_session", counting_get_session)
+
+    async def scenario():
+        session = _RequestSession(executor.runner, "c1")
+        await session.update({"drink": "라떼"})
+        await session.update({"size": "Tall"})
+        # Served from the copy read on first use, not yet written
+        assert (await session.get()).state == {"drink": "라떼", "size": "Tall"}
+        assert reads == ["c1"]
+        assert (await get_session(app_name="shop", user_id="self", session_id="c1")).events == []
+        await session.flush()
+        await session.flush()
+
+    asyncio.run(scenario())
+
+    stored = _stored_session(executor)
+    assert [event.actions.state_delta for event in stored.events] == [
+        {"drink": "라떼", "size": "Tall"}
+    ]
+
+
+class _StallingQueue(EventQueue):
+    """A client queue that fails or hangs on the task's artifact."""
+
+    def __init__(self, fail: bool):
+        super().__init__()
+        self._fail = fail
+
+    async def enqueue_event(self, event) -> None:
+        if isinstance(event, TaskArtifactUpdateEvent):
+            if self._fail:
+                raise RuntimeError("client went away")
+            await asyncio.sleep(60)
+        await super().enqueue_event(event)
+
+
+def _route_cart(data: dict, state) -> tuple[str, dict] | None:
+    return ("save_cart", {"drink": data["drink"]}) if "drink" in data else None
+
+
+async def save_cart(drink: str) -> dict:
+    return {"context_to_save": {"cart": drink}}
+
+
+@pytest.mark.parametrize("outcome", ["completed", "failed", "canceled"])
+def test_state_saved_during_a_turn_is_persisted_however_the_run_ends(outcome):
+    # The cart is saved by the fast path's tool call and still pending when
+    # publishing the reply completes, fails or hangs until cancelled
+    executor = _executor(
+        [],
+        [save_cart],
+        streaming=False,
+        executor_options={"fast_path": "direct", "mandate_router": _route_cart},
+    )
+
+    async def scenario():
+        queue = EventQueue() if outcome == "completed" else _StallingQueue(outcome == "failed")
+        context = _context({"drink": "라떼"})
+        run = asyncio.create_task(executor.execute(context, queue))
+        if outcome == "canceled":
+            await asyncio.sleep(0.1)
+            await executor.cancel(context, queue)
+        try:
+            await run
+        except (asyncio.CancelledError, RuntimeError):
+            assert outcome != "completed"
+        return await _drain(queue)
+
+    events = asyncio.run(scenario())
+
+    if outcome != "failed":
+        assert events[-1].status.state == TaskState(outcome)
+    assert _stored_session(executor).state["cart"] == "라떼"
@@ -0,0 +1,61 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""CartMandate templates."""
+
+from decimal import Decimal
+
+from server.agents import menu
+from server.agents.cart_templates import CartTemplateCache
+
+PAY_TO = "0x000000000000000000000000000000000000dEaD"
+
+
+def _catalogs():
+    old = menu.CompiledCatalog.compile(menu.MENU, menu.SIZES, menu.BEANS, version=1)
+    new = menu.CompiledCatalog.compile(menu.MENU, menu.SIZES, menu.BEANS, version=2)
+    return old, new
+
+
+def test_cart_lines_add_up_to_the_payment_amount():
+    _, catalog = _catalogs()
+    lines = (
+        (("아메리카노", "Tall", "일반"), 1),
+        (("카페라떼", "Tall", "일반"), 1),
+        (("모카", "Grande", "디카페인"), 3),
+    )
+    template = CartTemplateCache(PAY_TO).get(catalog, lines)
+    details = template.cart_contents.payment_request.details
+
+    items = [Decimal(str(item.amount.value)) for item in details.display_items]
+    total = Decimal(str(details.total.amount.value))
+    assert items == [Decimal("0.045"), Decimal("0.05"), Decimal("0.204")]
+    assert sum(items) == total
+    assert total * 1_000_000 == int(template.requirements.max_amount_required)
+
+
+def test_older_catalog_does_not_clear_the_cache():
+    old, new = _catalogs()
+    cache = CartTemplateCache(PAY_TO)
+    lines = ((("아메리카노", "Tall", "일반"), 1),)
+    template = cache.get(new, lines)
+
+    assert cache.get(old, lines) is not template
+    assert cache.get(new, lines) is template
+    assert len(cache) == 1
+
+
+def test_format_amount_usd_is_exact():
+    assert menu.format_amount_usd(45_000) == "0.045000"
+    assert menu.format_amount_usd(1_234_567) == "1.234567"
+    assert menu.format_amount_usd(-5_000) == "-0.005000"
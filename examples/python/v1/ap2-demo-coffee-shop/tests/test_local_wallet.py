@@ -0,0 +1,101 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""The wallet service's HTTP contract."""
+
+import importlib
+import logging
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from starlette.testclient import TestClient
+
+from benchmarks.eip712_cache import make_transfer_payload
+from common.canonical import canonical_json
+
+MANDATE = {"payload": {"total": 4500, "item": "라떼", "currency": "KRW"}}
+
+
+@pytest.fixture(scope="module")
+def wallet():
+    key = Account.create().key.hex()
+    root = logging.getLogger()
+    saved = root.handlers, root.level
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("CLIENT_PRIVATE_KEY", key)
+        module = importlib.import_module("local_wallet")
+        yield module
+    root.handlers, root.level = saved
+
+
+def _recover(message: str, signature: str) -> str:
+    return Account.recover_message(encode_defunct(text=message), signature=signature)
+
+
+def test_sign_returns_the_canonical_text_it_signed(wallet):
+    response = wallet.app.test_client().post("/sign", json=MANDATE)
+
+    body = response.get_json()
+    assert body["signed_message"] == canonical_json(MANDATE["payload"]).decode()
+    assert _recover(body["signed_message"], body["signature"]) == body["address"]
+
+
+def test_sign_omits_the_signed_message_for_typed_data(wallet):
+    payload = make_transfer_payload(wallet.account.address, 1)
+    body = wallet.app.test_client().post("/sign", json=payload).get_json()
+
+    assert "signed_message" not in body
+    assert body["signature"].startswith("0x")
+
+
+def _mandate(n: int) -> dict:
+    return {"payload": {"order": n, "item": "라떼"}}
+
+
+def test_async_wallet_rejects_work_beyond_max_pending(wallet):
+    app = wallet.create_async_app(workers=1, max_pending=1)
+    with TestClient(app) as client:
+        busy = client.post("/sign/batch", json={"payloads": [_mandate(1), _mandate(2)]})
+        signed = client.post("/sign", json=_mandate(3))
+
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "1"
+    # The lifespan started the signing pool, so work within the bound is signed
+    assert signed.status_code == 200
+    assert _recover(signed.json()["signed_message"], signed.json()["signature"]) == (
+        wallet.account.address
+    )
+
+
+@pytest.mark.parametrize("mode", ["dev", "async"])
+def test_sign_batch_returns_results_in_request_order(wallet, mode):
+    # Distinct payloads, an empty entry and a repeat, so cached, signed and
+    # failed items are interleaved
+    payloads = [_mandate(100 + i) for i in range(8)]
+    payloads[3] = {}
+    payloads[6] = payloads[1]
+    body = {"payloads": payloads}
+    if mode == "dev":
+        results = wallet.app.test_client().post("/sign/batch", json=body).get_json()
+    else:
+        with TestClient(wallet.create_async_app(workers=2, max_pending=64)) as client:
+            results = client.post("/sign/batch", json=body).json()
+
+    for payload, result in zip(payloads, results["results"], strict=True):
+        if not payload:
+            assert result == {"error": "Payload not provided"}
+            continue
+        expected = canonical_json(payload["payload"]).decode()
+        assert result["signed_message"] == expected
+        assert _recover(expected, result["signature"]) == results["address"]
@@ -0,0 +1,51 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Hot-path logging: lazy arguments are formatted on the writer thread."""
+
+import logging
+import queue
+import threading
+from logging.handlers import QueueListener
+
+from common import logs
+
+
+def test_lazy_arguments_are_formatted_by_the_writer_thread():
+    formatted_on = []
+    written = []
+
+    def describe() -> str:
+        formatted_on.append(threading.current_thread())
+        return "라떼 1잔"
+
+    class Writer(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            written.append(self.format(record))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, Writer())
+    logger = logging.getLogger("test.logs.deferred")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logs.DeferredQueueHandler(records))
+    listener.start()
+    try:
+        logger.info("order: %s", logs.lazy(describe))
+    finally:
+        listener.stop()
+        logger.handlers.clear()
+
+    assert written == ["order: 라떼 1잔"]
+    assert len(formatted_on) == 1
+    assert formatted_on[0] is not threading.current_thread()
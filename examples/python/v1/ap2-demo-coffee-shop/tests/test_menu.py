@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Catalog hot reload."""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from server.agents import menu
+
+EXAMPLE_CATALOG = Path(__file__).parent.parent / "menu.example.json"
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = tmp_path / "menu.json"
+    path.write_bytes(EXAMPLE_CATALOG.read_bytes())
+    return path
+
+
+def _rewrite(path: Path, data: dict, mtime: int) -> None:
+    path.write_text(json.dumps(data, ensure_ascii=False))
+    os.utime(path, (mtime, mtime))
+
+
+def test_concurrent_callers_reload_once(catalog_file, monkeypatch):
+    store = menu.CatalogStore(str(catalog_file), check_interval=0)
+    data = json.loads(catalog_file.read_text())
+    data["menu"]["아메리카노"]["base_price"] = 46_000
+    _rewrite(catalog_file, data, 2_000_000_000)
+
+    reloads = []
+    reload = store._reload
+    monkeypatch.setattr(store, "_reload", lambda: reloads.append(1) or reload())
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        store.get()
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(reloads) == 1
+    assert store.get().version == 3
+    assert store.get().quote("아메리카노", "Tall", "일반") == 46_000
+
+
+@pytest.mark.parametrize(
+    "breakage",
+    [
+        lambda d: d.pop("beans"),
+        lambda d: d["menu"]["모카"].update(base_price="6000"),
+        lambda d: d["sizes"].pop(menu.DEFAULT_SIZE),
+        lambda d: d["menu"]["모카"].pop("description"),
+        lambda d: d["sizes"]["Short"].update(price_diff=-100_000),
+    ],
+)
+def test_invalid_catalog_keeps_current_version(catalog_file, breakage):
+    store = menu.CatalogStore(str(catalog_file), check_interval=0)
+    current = store.get()
+    data = json.loads(catalog_file.read_text())
+    breakage(data)
+    _rewrite(catalog_file, data, 2_000_000_000)
+
+    assert store.get() is current
+    # Reading the current snapshot still works on the request path
+    assert current.display["menu"]
+
+
+def test_quote_many_matches_per_order_prices():
+    catalog = menu.CompiledCatalog.compile(menu.MENU, menu.SIZES, menu.BEANS)
+    orders = [
+        (drink, size, bean) for drink in menu.MENU for size in menu.SIZES for bean in menu.BEANS
+    ]
+    expected = [
+        menu.MENU[d]["base_price"] + menu.SIZES[s]["price_diff"] + menu.BEANS[b]["price_diff"]
+        for d, s, b in orders
+    ]
+
+    assert catalog.quote_many(reversed(orders)) == expected[::-1]
+    with pytest.raises(ValueError, match="Unknown size"):
+        catalog.quote_many([orders[0], ("아메리카노", "Huge", "일반")])
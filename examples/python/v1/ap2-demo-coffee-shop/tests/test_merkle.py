@@ -0,0 +1,108 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Merkle-batched merchant authorization."""
+
+import asyncio
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from common import codec, merkle
+from common.canonical import canonical_json
+from common.signer import InProcessSigner
+
+MERCHANT = "0x000000000000000000000000000000000000dEaD"
+CHAIN_ID = merkle.CHAIN_IDS["base-sepolia"]
+
+
+@pytest.fixture
+def account():
+    return Account.create()
+
+
+def _carts(count: int) -> list[dict]:
+    return [{"id": f"cart_{i}", "total": 45_000 + i} for i in range(count)]
+
+
+def _authorize(account, carts: list[dict]) -> list[str]:
+    async def run():
+        authorizer = merkle.MerkleBatchAuthorizer(
+            InProcessSigner(account.key.hex()), MERCHANT, CHAIN_ID, window_seconds=0.01
+        )
+        return await asyncio.gather(
+            *(authorizer.authorize(canonical_json(cart).decode()) for cart in carts)
+        )
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("count", [1, 2, 5, 8])
+def test_every_cart_verifies(account, count):
+    carts = _carts(count)
+    authorizations = _authorize(account, carts)
+    # One root for the whole batch
+    assert len({codec.loads(a)["root"] for a in authorizations}) == 1
+    for cart, authorization in zip(carts, authorizations, strict=True):
+        assert merkle.verify_cart_authorization(
+            cart, authorization, MERCHANT, CHAIN_ID, account.address
+        )
+
+
+def test_rejects_other_cart_merchant_chain_or_signer(account):
+    carts = _carts(3)
+    authorization = _authorize(account, carts)[0]
+    assert not merkle.verify_cart_authorization(
+        carts[1], authorization, MERCHANT, CHAIN_ID, account.address
+    )
+    assert not merkle.verify_cart_authorization(
+        carts[0], authorization, account.address, CHAIN_ID, account.address
+    )
+    assert not merkle.verify_cart_authorization(
+        carts[0], authorization, MERCHANT, merkle.CHAIN_IDS["base"], account.address
+    )
+    assert not merkle.verify_cart_authorization(
+        carts[0], authorization, MERCHANT, CHAIN_ID, Account.create().address
+    )
+    # The merchant and chain in the authorization are covered by the signature
+    forged = codec.loads(authorization) | {"chain_id": merkle.CHAIN_IDS["base"]}
+    assert not merkle.verify_cart_authorization(
+        carts[0], codec.dumps_str(forged), MERCHANT, merkle.CHAIN_IDS["base"], account.address
+    )
+
+
+def test_inner_node_cannot_pass_as_a_cart():
+    leaves = [merkle.cart_leaf(cart) for cart in _carts(4)]
+    levels = merkle.build_levels(leaves)
+    root = levels[-1][0]
+    left, right = sorted(levels[0][:2])
+    # Bytes that hash to the first inner node without domain separation
+    inner_preimage = left + right
+    proof = merkle.merkle_proof(levels, 0)[1:]
+    assert merkle.verify_proof(levels[1][0], proof, root)
+    assert not merkle.verify_proof(merkle.cart_leaf(inner_preimage), proof, root)
+
+
+def test_root_signature_is_not_a_personal_message(account):
+    authorization = codec.loads(_authorize(account, _carts(2))[0])
+    recovered = Account.recover_message(
+        encode_defunct(text=authorization["root"]), signature=authorization["signature"]
+    )
+    assert recovered != account.address
+
+
+def test_is_merkle_authorization(account):
+    assert merkle.is_merkle_authorization(_authorize(account, _carts(1))[0])
+    assert not merkle.is_merkle_authorization("0x" + "00" * 65)
+    assert not merkle.is_merkle_authorization(None)
@@ -0,0 +1,61 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""The coffee shop server's non-agent HTTP routes."""
+
+import importlib
+import logging
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from server.agents.menu import get_menu_document
+
+
+@pytest.fixture(scope="module")
+def client():
+    root = logging.getLogger()
+    saved = root.handlers, root.level
+    with pytest.MonkeyPatch.context() as patch:
+        # Importing the server builds the agents, which need a payee
+        patch.setenv("MERCHANT_WALLET_ADDRESS", "0x" + "11" * 20)
+        server = importlib.import_module("server.__main__")
+    root.handlers, root.level = saved
+    app = Starlette(routes=[Route("/menu", server.menu, methods=["GET"])])
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "status"),
+    [
+        ("{etag}", 304),
+        ("W/{etag}", 304),
+        ('"other", {etag}', 304),
+        ("*", 304),
+        ('"other"', 200),
+        # A value that merely contains the current tag does not match
+        ("{etag}-gzip", 200),
+        ("{bare}", 200),
+    ],
+)
+def test_menu_if_none_match(client, if_none_match, status):
+    _, etag = get_menu_document()
+    header = if_none_match.format(etag=etag, bare=etag.strip('"'))
+
+    response = client.get("/menu", headers={"If-None-Match": header})
+
+    assert response.status_code == status
+    assert response.headers["ETag"] == etag
@@ -0,0 +1,109 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Signature parity for the EIP-712 cache and the signing backends."""
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+
+from benchmarks.eip712_cache import make_transfer_payload
+from benchmarks.signing_backends import make_mandate_payload
+from common import signing, typed_data
+from common.backends import EthAccountBackend, NativeBackend, coincurve
+from common.signer import create_signer
+
+
+@pytest.fixture
+def account():
+    return Account.create()
+
+
+def test_cached_encoder_signs_identically(account):
+    payloads = [make_transfer_payload(account.address, 45_000 + i) for i in range(20)]
+    for payload in payloads:
+        expected = account.sign_message(encode_typed_data(full_message=payload))
+        actual = account.sign_message(typed_data.encode_typed_data_cached(payload))
+        assert bytes(actual.signature) == bytes(expected.signature)
+
+
+def test_cached_encoder_uses_eth_account_internals():
+    # The fast path imports eth_account._utils; a release that moves it
+    # silently falls back to the slow path, so fail loudly instead.
+    assert typed_data.encode_field is not None
+
+
+def test_fallback_encoder_signs_identically(account, monkeypatch):
+    monkeypatch.setattr(typed_data, "encode_field", None)
+    payload = make_transfer_payload(account.address, 7)
+    expected = account.sign_message(encode_typed_data(full_message=payload))
+    actual = account.sign_message(typed_data.encode_typed_data_cached(payload))
+    assert bytes(actual.signature) == bytes(expected.signature)
+
+
+def test_cache_compiles_each_domain_once(account, monkeypatch):
+    compiled = []
+    compile_typed_data = typed_data.compile_typed_data
+
+    def counting_compile(payload):
+        compiled.append(payload["domain"]["verifyingContract"])
+        return compile_typed_data(payload)
+
+    cache = typed_data.TypedDataCache(maxsize=4)
+    monkeypatch.setattr(typed_data, "_cache", cache)
+    monkeypatch.setattr(typed_data, "compile_typed_data", counting_compile)
+
+    first = make_transfer_payload(account.address, 1)
+    second = make_transfer_payload(account.address, 2)
+    encoded = [typed_data.encode_typed_data_cached(p) for p in (first, second)]
+
+    # The second payload differs only in its message and hits the cache
+    assert len(compiled) == 1
+    assert cache.get(second) is cache.get(first)
+    assert encoded[0].header == encoded[1].header
+    assert encoded[0].body != encoded[1].body
+
+
+def _backends(account):
+    backends = [EthAccountBackend(account)]
+    if coincurve is not None:
+        backends.append(NativeBackend(account))
+    return backends
+
+
+def test_backends_match_sign_message(account):
+    payloads = [make_transfer_payload(account.address, i) for i in range(10)]
+    payloads += [make_mandate_payload(i) for i in range(10)]
+    for payload in payloads:
+        expected = "0x" + account.sign_message(signing.encode_payload(payload)).signature.hex()
+        for backend in _backends(account):
+            assert signing.sign_payload(backend, payload) == expected, backend.name
+
+
+@pytest.mark.skipif(coincurve is None, reason="coincurve is not installed")
+def test_native_backend_is_byte_identical(account):
+    payload = make_transfer_payload(account.address, 45_000)
+    message_hash = signing.hash_signable(signing.encode_payload(payload))
+    assert NativeBackend(account).sign_hash(message_hash) == EthAccountBackend(
+        account
+    ).sign_hash(message_hash)
+
+
+@pytest.mark.parametrize(
+    "wallet_url",
+    [b"http://localhost:5001", "ftp://wallet", "unix://", "inproc://NO_SUCH_KEY"],
+)
+def test_create_signer_rejects_unusable_wallet_urls(wallet_url, monkeypatch):
+    monkeypatch.delenv("NO_SUCH_KEY", raising=False)
+    with pytest.raises(ValueError):
+        create_signer(wallet_url)